@@ -12,10 +12,15 @@ Features:
 - User Authentication with OTP
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, make_response
+from flask import Flask, Response, g, render_template, request, jsonify, session, redirect, url_for, flash, make_response
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import islice
+from jinja2 import FileSystemBytecodeCache
+import json
 import os
 import secrets
+import time
 
 # Import custom modules
 from modules.recommendation_engine import get_recommendations, generate_itinerary
@@ -45,17 +50,95 @@ from modules.auth_module import (
     init_database,
     get_user_details
 )
-from modules.user_module import get_user_history, add_user_history
+from modules.user_module import get_user_history, queue_user_history
 from modules.geospatial_service import GeospatialService
 from modules.ai_recommendation import AIRecommender
 
+# Try to import orjson for faster JSON encoding on the heavier API responses
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Try to import Flask-Compress for gzip/brotli responses
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+
+def dump_json(obj):
+    """Serialize obj to JSON, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+def json_response(obj, status=200):
+    """Build a JSON response without going through jsonify"""
+    return Response(dump_json(obj), status=status, mimetype='application/json')
+
+
+def get_number(data, key, default, cast=float):
+    """
+    Read a numeric field from form data, query args or a JSON body.
+    Missing or empty values give the default; values that already have the
+    right type (JSON numbers usually do) are returned without conversion.
+    """
+    value = data.get(key)
+    if value is None or value == '':
+        return default
+    if type(value) is cast:
+        return value
+    return cast(value)
+
 # Initialize AI Recommender
 ai_recommender = None # Lazy init to ensure DESTINATIONS are loaded
 
 
 app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', secrets.token_hex(32))
+app.secret_key = os.environ.get('SECRET_KEY')
+if not app.secret_key:
+    if __name__ == '__main__':
+        # Local development server only: sessions won't survive a restart
+        app.secret_key = secrets.token_hex(32)
+    else:
+        # A random per-process key would log everyone out on every restart and
+        # break sessions across multiple workers, so refuse to start instead
+        raise RuntimeError("SECRET_KEY environment variable must be set")
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
+# Only re-sign and resend the session cookie when a view actually changes the
+# session, not on every read-only response for logged-in (permanent) sessions
+app.config['SESSION_REFRESH_EACH_REQUEST'] = False
+
+# Keep session data server-side in Redis when REDIS_URL is configured, so
+# only a short session id travels in the cookie on every request
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    try:
+        import redis
+        from flask_session import Session
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.from_url(REDIS_URL)
+        Session(app)
+    except ImportError:
+        print("Warning: REDIS_URL is set but flask-session/redis are not installed. Run: pip install flask-session redis")
+
+# Static URLs carry a version parameter (see add_static_version), so browsers
+# can cache the files for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
+
+# Share compiled templates across worker processes and restarts. Template
+# auto-reload already stays off unless debug mode is enabled.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Compress HTML and JSON responses when Flask-Compress is installed
+if COMPRESS_AVAILABLE:
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
 
 # Initialize database on startup
 try:
@@ -71,6 +154,91 @@ except Exception as e:
     print(f"AI Engine Init Failed: {e}")
 
 
+# Worker pool for side-effect writes whose result the response doesn't need
+background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='background')
+
+
+# ==================== PRECOMPUTED VIEW DATA ====================
+# DESTINATIONS is static, so the per-page projections are built once here
+# instead of on every request.
+
+# First four destinations, featured on the home and pricing pages
+FEATURED_DESTINATIONS = tuple(islice(DESTINATIONS.values(), 4))
+FEATURED_IDS = tuple(islice(DESTINATIONS.keys(), 4))
+ALL_DESTINATION_IDS = tuple(DESTINATIONS.keys())
+
+_API_DESTINATIONS_JSON = dump_json({'destinations': [
+    {
+        'id': dest_id,
+        'name': dest['name'],
+        'eco_score': dest['eco_score'],
+        'types': dest['type'],
+        'budget_level': dest['budget_level']
+    }
+    for dest_id, dest in DESTINATIONS.items()
+]})
+
+_AR_DESTINATIONS = [
+    {
+        'id': dest_id,
+        'name': dest['name'],
+        'cultural_info': dest['ar_content']['cultural_info'],
+        'eco_tips': dest['ar_content']['eco_tips']
+    }
+    for dest_id, dest in DESTINATIONS.items()
+]
+
+def _build_local_data():
+    """Aggregate local guides and homestays from all destinations in one pass"""
+    local_data = {
+        'guides': [],
+        'homestays': [],
+        'destinations': []
+    }
+    
+    for dest_id, dest in DESTINATIONS.items():
+        local_data['destinations'].append({
+            'id': dest_id,
+            'name': dest['name'],
+            'eco_score': dest['eco_score'],
+            'sustainability_features': dest['sustainability_features'],
+            'local_guides': dest['local_guides'],
+            'homestays': dest['homestays']
+        })
+        
+        for guide in dest['local_guides']:
+            local_data['guides'].append({
+                'name': guide,
+                'destination': dest['name'],
+                'eco_score': dest['eco_score']
+            })
+        
+        for homestay in dest['homestays']:
+            local_data['homestays'].append({
+                'name': homestay,
+                'destination': dest['name'],
+                'eco_score': dest['eco_score']
+            })
+    
+    return local_data
+
+
+_LOCAL_DATA = _build_local_data()
+
+# Footer year, re-read from the clock at most once a day
+_current_year = datetime.now().year
+_year_checked_at = time.time()
+
+
+def get_current_year():
+    """Return the cached current year, refreshing it daily"""
+    global _current_year, _year_checked_at
+    if time.time() - _year_checked_at > 86400:
+        _current_year = datetime.now().year
+        _year_checked_at = time.time()
+    return _current_year
+
+
 # ==================== AUTHENTICATION ROUTES ====================
 
 @app.route('/welcome')
@@ -79,7 +247,7 @@ def welcome():
     # If already logged in, redirect to home
     if 'user_id' in session:
         return redirect(url_for('index'))
-    return render_template('welcome.html', current_year=datetime.now().year)
+    return render_template('welcome.html', current_year=get_current_year())
 
 
 @app.route('/signup', methods=['GET', 'POST'])
@@ -236,7 +404,7 @@ def verify_signin():
                               httponly=True)
             # Also set a remember token
             token = secrets.token_urlsafe(32)
-            set_remember_token(user_data.get('id'), token)
+            background_executor.submit(set_remember_token, user_data.get('id'), token)
             response.set_cookie('remember_token', token, max_age=30*24*60*60, httponly=True)
         
         flash(f'Welcome back, {user_data.get("first_name")}!', 'success')
@@ -310,9 +478,9 @@ def logout():
     """User logout"""
     user_id = session.get('user_id')
     
-    # Clear remember token
+    # Clear remember token (the cookie is deleted below regardless)
     if user_id:
-        clear_remember_token(user_id)
+        background_executor.submit(clear_remember_token, user_id)
     
     # Clear session
     session.clear()
@@ -371,42 +539,68 @@ def api_resend_otp():
 
 # ==================== MIDDLEWARE ====================
 
+# Public routes that don't require authentication
+PUBLIC_ROUTES = frozenset({
+    'welcome', 'signin', 'signup', 'verify_signup', 'verify_signin',
+    'forgot_password', 'reset_password_route', 'logout',
+    'api_check_unique', 'api_resend_otp', 'static'
+})
+
+
 @app.before_request
 def check_authentication():
     """Check authentication for protected routes"""
-    # Public routes that don't require authentication
-    public_routes = [
-        'welcome', 'signin', 'signup', 'verify_signup', 'verify_signin',
-        'forgot_password', 'reset_password_route', 'logout',
-        'api_check_unique', 'api_resend_otp', 'static'
-    ]
-    
-    # Check if route requires auth
-    if request.endpoint and request.endpoint not in public_routes:
-        if 'user_id' not in session:
-            # Check for remember token
-            remember_token = request.cookies.get('remember_token')
-            if remember_token:
-                user = get_user_by_remember_token(remember_token)
-                if user:
-                    session.permanent = True
-                    session['user_id'] = user['id']
-                    session['username'] = user['username']
-                    session['email'] = user['email']
-                    session['first_name'] = user['first_name']
-                    session['last_name'] = user['last_name']
-                    return  # Allow access
-            
-            # Redirect to welcome page
-            return redirect(url_for('welcome'))
+    # Static assets make up most requests on a page load; skip them first
+    endpoint = request.endpoint
+    if endpoint == 'static':
+        return
+    
+    # Unmatched URLs (404s) and public routes skip the session check
+    if endpoint is None or endpoint in PUBLIC_ROUTES:
+        return
+    
+    if 'user_id' not in session:
+        # Check for remember token
+        remember_token = request.cookies.get('remember_token')
+        if remember_token:
+            user = get_user_by_remember_token(remember_token)
+            if user:
+                session.permanent = True
+                session['user_id'] = user['id']
+                session['username'] = user['username']
+                session['email'] = user['email']
+                session['first_name'] = user['first_name']
+                session['last_name'] = user['last_name']
+                return  # Allow access
+        
+        # Redirect to welcome page
+        return redirect(url_for('welcome'))
+
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    """Append the file's mtime to static URLs so cached copies are busted on change"""
+    if endpoint != 'static' or 'filename' not in values:
+        return
+    
+    # Stat on every call rather than caching the mtime, so an edited file gets
+    # a new URL without a restart (browsers keep the old one for a year)
+    try:
+        values['v'] = int(os.stat(os.path.join(app.static_folder, values['filename'])).st_mtime)
+    except OSError:
+        return
 
 
 @app.context_processor
 def inject_user():
     """Inject current user into all templates"""
+    # Resolve the user once per request, however many templates are rendered
+    if 'current_user' not in g:
+        g.current_user = get_current_user()
+        g.is_authenticated = 'user_id' in session
     return {
-        'current_user': get_current_user(),
-        'is_authenticated': 'user_id' in session
+        'current_user': g.current_user,
+        'is_authenticated': g.is_authenticated
     }
 
 
@@ -416,8 +610,8 @@ def inject_user():
 def index():
     """Landing page with feature overview"""
     return render_template('index.html', 
-                         destinations=list(DESTINATIONS.values())[:4],
-                         current_year=datetime.now().year)
+                         destinations=FEATURED_DESTINATIONS,
+                         current_year=get_current_year())
 
 
 @app.route('/planner', methods=['GET', 'POST'])
@@ -427,8 +621,8 @@ def planner():
         # Get form data
         budget = request.form.get('budget', 'medium')
         travel_type = request.form.get('travel_type', 'nature')
-        duration = int(request.form.get('duration', 5))
-        sustainability = int(request.form.get('sustainability', 7))
+        duration = get_number(request.form, 'duration', 5, int)
+        sustainability = get_number(request.form, 'sustainability', 7, int)
         
         # Get recommendations using rule-based engine
         recommendations = get_recommendations(budget, travel_type, duration, sustainability)
@@ -483,8 +677,7 @@ def itinerary(destination_id):
     
     # Record history if logged in
     if 'user_id' in session:
-        dest_name = DESTINATIONS.get(destination_id, {}).get('name', 'Unknown Destination')
-        add_user_history(session['user_id'], dest_name, destination_id)
+        queue_user_history(session['user_id'], destination_id)
 
     return render_template('itinerary.html',
                          itinerary=itinerary_data,
@@ -501,11 +694,11 @@ def carbon():
     if request.method == 'POST':
         # Get calculator inputs
         transport = request.form.get('transport', 'train')
-        distance = float(request.form.get('distance', 500))
+        distance = get_number(request.form, 'distance', 500.0)
         accommodation = request.form.get('accommodation', 'standard_hotel')
-        nights = int(request.form.get('nights', 3))
+        nights = get_number(request.form, 'nights', 3, int)
         food = request.form.get('food', 'mixed')
-        passengers = int(request.form.get('passengers', 1))
+        passengers = get_number(request.form, 'passengers', 1, int)
         
         # Calculate using fixed emission factors
         result = calculate_total_footprint(
@@ -520,16 +713,18 @@ def carbon():
 @app.route('/pricing')
 def pricing():
     """Dynamic pricing insights page"""
+    # Read the clock once for the whole page
+    now = datetime.now()
+    
     # Get current season info
-    season = get_current_season()
+    season = get_current_season(now)
     
     # Get pricing comparison for all destinations
-    all_dest_ids = list(DESTINATIONS.keys())
-    comparison = get_pricing_comparison(all_dest_ids)
+    comparison = get_pricing_comparison(ALL_DESTINATION_IDS, now)
     
     # Get detailed analysis for featured destinations
     featured_analyses = []
-    for dest_id in list(DESTINATIONS.keys())[:4]:
+    for dest_id in FEATURED_IDS:
         analysis = get_best_time_to_book(dest_id)
         if analysis:
             featured_analyses.append(analysis)
@@ -543,57 +738,15 @@ def pricing():
 @app.route('/local')
 def local():
     """Local economy integration showcase"""
-    # Aggregate local guides and homestays from all destinations
-    local_data = {
-        'guides': [],
-        'homestays': [],
-        'destinations': []
-    }
-    
-    for dest_id, dest in DESTINATIONS.items():
-        dest_summary = {
-            'id': dest_id,
-            'name': dest['name'],
-            'eco_score': dest['eco_score'],
-            'sustainability_features': dest['sustainability_features'],
-            'local_guides': dest['local_guides'],
-            'homestays': dest['homestays']
-        }
-        local_data['destinations'].append(dest_summary)
-        
-        for guide in dest['local_guides']:
-            local_data['guides'].append({
-                'name': guide,
-                'destination': dest['name'],
-                'eco_score': dest['eco_score']
-            })
-        
-        for homestay in dest['homestays']:
-            local_data['homestays'].append({
-                'name': homestay,
-                'destination': dest['name'],
-                'eco_score': dest['eco_score']
-            })
-    
     return render_template('local.html',
-                         local_data=local_data,
+                         local_data=_LOCAL_DATA,
                          unwto_goals=UNWTO_GOALS)
 
 
 @app.route('/ar')
 def ar():
     """WebAR cultural engagement page"""
-    # Prepare AR content from destinations
-    ar_destinations = []
-    for dest_id, dest in DESTINATIONS.items():
-        ar_destinations.append({
-            'id': dest_id,
-            'name': dest['name'],
-            'cultural_info': dest['ar_content']['cultural_info'],
-            'eco_tips': dest['ar_content']['eco_tips']
-        })
-    
-    return render_template('ar.html', destinations=ar_destinations)
+    return render_template('ar.html', destinations=_AR_DESTINATIONS)
 
 
 # ==================== API ENDPOINTS ====================
@@ -606,11 +759,11 @@ def api_recommendations():
     recommendations = get_recommendations(
         data.get('budget', 'medium'),
         data.get('travel_type', 'nature'),
-        int(data.get('duration', 5)),
-        int(data.get('sustainability', 7))
+        get_number(data, 'duration', 5, int),
+        get_number(data, 'sustainability', 7, int)
     )
     
-    return jsonify({'recommendations': recommendations})
+    return json_response({'recommendations': recommendations})
 
 
 @app.route('/api/carbon', methods=['POST'])
@@ -620,14 +773,14 @@ def api_carbon():
     
     result = calculate_total_footprint(
         data.get('transport', 'train'),
-        float(data.get('distance', 500)),
+        get_number(data, 'distance', 500.0),
         data.get('accommodation', 'standard_hotel'),
-        int(data.get('nights', 3)),
+        get_number(data, 'nights', 3, int),
         data.get('food', 'mixed'),
-        int(data.get('passengers', 1))
+        get_number(data, 'passengers', 1, int)
     )
     
-    return jsonify(result)
+    return json_response(result)
 
 
 @app.route('/api/calculate-trip', methods=['POST'])
@@ -692,16 +845,7 @@ def api_ai_recommend():
 @app.route('/api/destinations')
 def api_destinations():
     """API endpoint to list all destinations"""
-    destinations = []
-    for dest_id, dest in DESTINATIONS.items():
-        destinations.append({
-            'id': dest_id,
-            'name': dest['name'],
-            'eco_score': dest['eco_score'],
-            'types': dest['type'],
-            'budget_level': dest['budget_level']
-        })
-    return jsonify({'destinations': destinations})
+    return Response(_API_DESTINATIONS_JSON, mimetype='application/json')
 
 
 @app.route('/api/geocode', methods=['POST'])
@@ -721,23 +865,23 @@ def api_geocode():
 def api_nearby_places():
     """Proxy for Overpass API nearby places"""
     data = request.get_json()
-    lat = float(data.get('lat', 0))
-    lon = float(data.get('lon', 0))
-    radius = int(data.get('radius', 5000))
+    lat = get_number(data, 'lat', 0.0)
+    lon = get_number(data, 'lon', 0.0)
+    radius = get_number(data, 'radius', 5000, int)
     place_type = data.get('type', 'all')
     
     places = GeospatialService.get_nearby_places(lat, lon, radius, place_type)
-    return jsonify(places)
+    return json_response(places)
 
 
 @app.route('/api/calculate-distance', methods=['POST'])
 def api_calculate_distance():
     """Calculate distance and provide feedback"""
     data = request.get_json()
-    lat1 = float(data.get('lat1', 0))
-    lon1 = float(data.get('lon1', 0))
-    lat2 = float(data.get('lat2', 0))
-    lon2 = float(data.get('lon2', 0))
+    lat1 = get_number(data, 'lat1', 0.0)
+    lon1 = get_number(data, 'lon1', 0.0)
+    lat2 = get_number(data, 'lat2', 0.0)
+    lon2 = get_number(data, 'lon2', 0.0)
     
     from modules.geospatial_service import haversine_distance
     distance = haversine_distance(lat1, lon1, lat2, lon2)
@@ -756,12 +900,60 @@ def map_page():
     return redirect(url_for('planner', mode='map'))
 
 
+def _build_custom_days(nearby):
+    """Distribute nearby places over a 3-day custom itinerary"""
+    days = []
+    
+    # Group places for variety in a single pass. Only the first two of each
+    # group are ever read (directly or via the all_places fallbacks).
+    temples, nature, culture, beaches = [], [], [], []
+    groups = {
+        'temple': temples,
+        'park': nature,
+        'mountain': nature,
+        'cultural': culture,
+        'beach': beaches
+    }
+    for p in nearby:
+        group = groups.get(p['category'])
+        if group is not None and len(group) < 2:
+            group.append(p)
+    
+    all_places = temples + nature + culture + beaches
+    
+    # Simple distribution logic
+    for i in range(3):
+        activities = []
+        if i == 0:
+            activities.append({'time': 'Morning', 'activity': 'Arrival & Check-in', 'type': 'relax'})
+            if nature: activities.append({'time': 'Afternoon', 'activity': f"Visit {nature[0]['name']}", 'type': 'nature'})
+            elif all_places: activities.append({'time': 'Afternoon', 'activity': f"Visit {all_places[0]['name']}", 'type': 'explore'})
+        elif i == 1:
+            if temples: activities.append({'time': 'Morning', 'activity': f"Visit {temples[0]['name']}", 'type': 'spiritual'})
+            if culture: activities.append({'time': 'Afternoon', 'activity': f"Explore {culture[0]['name']}", 'type': 'culture'})
+            elif len(all_places) > 1: activities.append({'time': 'Afternoon', 'activity': f"Visit {all_places[1]['name']}", 'type': 'explore'})
+        else:
+            if beaches: activities.append({'time': 'Morning', 'activity': f"Relax at {beaches[0]['name']}", 'type': 'beach'})
+            activities.append({'time': 'Evening', 'activity': 'Departure', 'type': 'travel'})
+            
+        days.append({
+            'day': i + 1,
+            'activities': activities
+        })
+    
+    return days
+
+
+# Plan used when no nearby places are found (or Overpass is unavailable)
+_NO_PLACES_DAYS = _build_custom_days([])
+
+
 @app.route('/plan-custom')
 def plan_custom():
     """Generate itinerary from map coordinates"""
     destination_name = request.args.get('destination', 'Selected Location')
-    dest_lat = float(request.args.get('lat', 0))
-    dest_lon = float(request.args.get('lon', 0))
+    dest_lat = get_number(request.args, 'lat', 0.0)
+    dest_lon = get_number(request.args, 'lon', 0.0)
     origin_lat = request.args.get('origin_lat')
     origin_lon = request.args.get('origin_lon')
     distance = request.args.get('distance')
@@ -794,40 +986,9 @@ def plan_custom():
         'duration': 3, # Default
         'eco_score': 8, # Optimistic default
         'overview': f"Sustainable trip to {destination_name}. Explore {len(nearby)} nearby eco-spots.",
-        'days': []
+        # Fill days with nearby places, skipping the builder when there are none
+        'days': _build_custom_days(nearby) if nearby else _NO_PLACES_DAYS
     }
-    
-    # Fill days with nearby places
-    current_day = 1
-    day_activities = []
-    
-    # Group places for variety
-    temples = [p for p in nearby if p['category'] == 'temple']
-    nature = [p for p in nearby if p['category'] == 'park' or p['category'] == 'mountain']
-    culture = [p for p in nearby if p['category'] == 'cultural']
-    beaches = [p for p in nearby if p['category'] == 'beach']
-    
-    all_places = temples + nature + culture + beaches
-    
-    # Simple distribution logic
-    for i in range(3):
-        activities = []
-        if i == 0:
-            activities.append({'time': 'Morning', 'activity': 'Arrival & Check-in', 'type': 'relax'})
-            if nature: activities.append({'time': 'Afternoon', 'activity': f"Visit {nature[0]['name']}", 'type': 'nature'})
-            elif all_places: activities.append({'time': 'Afternoon', 'activity': f"Visit {all_places[0]['name']}", 'type': 'explore'})
-        elif i == 1:
-            if temples: activities.append({'time': 'Morning', 'activity': f"Visit {temples[0]['name']}", 'type': 'spiritual'})
-            if culture: activities.append({'time': 'Afternoon', 'activity': f"Explore {culture[0]['name']}", 'type': 'culture'})
-            elif len(all_places) > 1: activities.append({'time': 'Afternoon', 'activity': f"Visit {all_places[1]['name']}", 'type': 'explore'})
-        else:
-            if beaches: activities.append({'time': 'Morning', 'activity': f"Relax at {beaches[0]['name']}", 'type': 'beach'})
-            activities.append({'time': 'Evening', 'activity': 'Departure', 'type': 'travel'})
-            
-        itinerary_data['days'].append({
-            'day': i + 1,
-            'activities': activities
-        })
         
     # Carbon info (mock for now based on distance)
     carbon_info = {
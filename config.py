@@ -27,6 +27,7 @@ PASSWORD_REQUIRE_UPPERCASE = True
 PASSWORD_REQUIRE_LOWERCASE = True
 PASSWORD_REQUIRE_DIGIT = True
 PASSWORD_REQUIRE_SPECIAL = True
+PASSWORD_HASH_ITERATIONS = 600000  # PBKDF2-SHA256 rounds when argon2 is not installed
 
 # Database Table Creation SQL
 CREATE_USERS_TABLE = """
@@ -4,9 +4,19 @@ Implements Content-Based Filtering using TF-IDF and Cosine Similarity.
 Designed to run with minimal dependencies (numpy optional but preferred, standard lib fallback).
 """
 
+import heapq
 import math
 import re
+from array import array
 from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+
+# Characters stripped by the tokenizer (anything but lowercase alphanumerics/whitespace)
+_RE_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+
+# Basic stop words removed during tokenization
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'})
 
 class AIRecommender:
     def __init__(self, destinations_data):
@@ -18,48 +28,58 @@ class AIRecommender:
         self.corpus = []
         self.doc_ids = []
         self.idf = {}
-        self.tf_vectors = {}
-        self.doc_norms = {}
+        # Sparse TF-IDF matrix stored by term: {term: (doc_indices, weights)}
+        # as two packed arrays holding only the non-zero entries, so a query
+        # only touches documents that share at least one of its terms. Weights
+        # are unit-normalized per document, so a dot product is already
+        # divided by ||doc||.
+        self.postings = {}
         
         # Build corpus and train
         self._prepare_corpus()
         self._compute_tfidf()
+        
+        # Repeated queries (search box, suggestion chips) reuse their vector
+        self._vectorize_query = lru_cache(maxsize=1024)(self._vectorize_query)
 
     def _tokenize(self, text):
         """Simple tokenizer: lowercase, remove special chars, split"""
         text = text.lower()
         # Remove non-alphanumeric chars
-        text = re.sub(r'[^a-z0-9\s]', '', text)
+        text = _RE_NON_ALNUM.sub('', text)
         words = text.split()
         # Basic stop words removal
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were'}
-        return [w for w in words if w not in stop_words]
+        return [w for w in words if w not in STOP_WORDS]
 
     def _prepare_corpus(self):
-        """Convert destination features into a text corpus"""
+        """Convert destination features into a tokenized corpus"""
+        tokenize = self._tokenize
         for dest_id, data in self.destinations.items():
             # Combine relevant fields for content matching
             # Weighting: Name (2x), Type (2x), Features (1.5x), Description (1x)
+            # Each field is tokenized once and its tokens repeated for weighting
             
-            text_parts = []
+            tokens = []
             
             # Name
-            text_parts.extend([data['name']] * 2)
+            tokens.extend(tokenize(data['name']) * 2)
             
             # Types
             if isinstance(data.get('type'), list):
-                text_parts.extend(data['type'] * 2)
+                type_tokens = []
+                for place_type in data['type']:
+                    type_tokens.extend(tokenize(place_type))
+                tokens.extend(type_tokens * 2)
             
             # Sustainability features
             if isinstance(data.get('sustainability_features'), list):
-                text_parts.extend(data['sustainability_features'])
+                for feature in data['sustainability_features']:
+                    tokens.extend(tokenize(feature))
                 
             # Description
-            text_parts.append(data.get('description', ''))
+            tokens.extend(tokenize(data.get('description', '')))
             
-            # Join and tokenize
-            full_text = " ".join(text_parts)
-            self.corpus.append(full_text)
+            self.corpus.append(tokens)
             self.doc_ids.append(dest_id)
 
     def _compute_tfidf(self):
@@ -67,85 +87,79 @@ class AIRecommender:
         N = len(self.corpus)
         df = Counter()
         
-        # 1. Calculate DF (Document Frequency)
-        doc_vocabs = []
-        for doc in self.corpus:
-            tokens = set(self._tokenize(doc))
-            doc_vocabs.append(tokens)
-            df.update(tokens)
+        # 1. Calculate DF (Document Frequency), counting each document's
+        # terms once and keeping the counts for the TF step
+        doc_term_counts = []
+        for tokens in self.corpus:
+            term_counts = Counter(tokens)
+            doc_term_counts.append((term_counts, len(tokens)))
+            df.update(term_counts.keys())
             
         # 2. Calculate IDF
         self.idf = {term: math.log(1 + N / (count + 1)) for term, count in df.items()}
         
         # 3. Calculate TF-IDF Vectors
-        for i, doc_text in enumerate(self.corpus):
-            tokens = self._tokenize(doc_text)
-            term_counts = Counter(tokens)
-            total_terms = len(tokens) if tokens else 1
+        postings = {}
+        for i, (term_counts, total_terms) in enumerate(doc_term_counts):
+            total_terms = total_terms or 1
             
             # TF: Term Count / Total Terms in Doc
-            # Vector is a dict {term: score}
             vec = {}
             for term, count in term_counts.items():
                 tf = count / total_terms
                 vec[term] = tf * self.idf.get(term, 0)
-                
-            self.tf_vectors[self.doc_ids[i]] = vec
             
-            # Precompute norm for cosine similarity
-            norm_sq = sum(score ** 2 for score in vec.values())
-            self.doc_norms[self.doc_ids[i]] = math.sqrt(norm_sq)
+            # Divide by the norm once here instead of on every query
+            norm = math.hypot(*vec.values())
+            if norm > 0:
+                for term, score in vec.items():
+                    if term not in postings:
+                        postings[term] = (array('I'), array('d'))
+                    doc_indices, weights = postings[term]
+                    doc_indices.append(i)
+                    weights.append(score / norm)
+        
+        self.postings = postings
 
     def _vectorize_query(self, query):
-        """Convert a user query into a TF-IDF vector"""
+        """
+        Convert a user query into a TF-IDF vector and its norm.
+        Returns ((term, score), ...) so the result can be cached per query.
+        """
         tokens = self._tokenize(query)
         term_counts = Counter(tokens)
         total_terms = len(tokens) if tokens else 1
+        idf = self.idf
         
-        vec = {}
-        for term, count in term_counts.items():
-            if term in self.idf:
-                tf = count / total_terms
-                vec[term] = tf * self.idf[term]
+        vec = tuple(
+            (term, count / total_terms * idf[term])
+            for term, count in term_counts.items()
+            if term in idf
+        )
         
-        return vec
+        # hypot takes the root of the sum of squares in a single C call
+        return vec, math.hypot(*(score for _, score in vec))
 
     def recommend(self, query, top_k=3):
         """
         Recommend destinations based on query using Cosine Similarity
         """
-        query_vec = self._vectorize_query(query)
-        query_norm = math.sqrt(sum(score ** 2 for score in query_vec.values()))
-        
-        if query_norm == 0:
-            return []
-            
-        scores = []
-        
-        for dest_id, dest_vec in self.tf_vectors.items():
-            # Dot product
-            dot_product = 0
-            for term, q_score in query_vec.items():
-                if term in dest_vec:
-                    dot_product += q_score * dest_vec[term]
-            
-            # Cosine Similarity = (A . B) / (||A|| * ||B||)
-            dest_norm = self.doc_norms[dest_id]
-            
-            if dest_norm > 0:
-                similarity = dot_product / (query_norm * dest_norm)
-            else:
-                similarity = 0
-                
-            scores.append((dest_id, similarity))
+        return self.recommend_batch([query], top_k)[0]
+
+    def recommend_batch(self, queries, top_k=3):
+        """
+        Recommend destinations for several queries in one call.
+        Identical queries are scored once; returns one result list per query.
+        """
+        ranked = {}
+        batch = []
+        for query in queries:
+            if query not in ranked:
+                ranked[query] = self._rank(query, top_k)
             
-        # Sort by similarity desc
-        scores.sort(key=lambda x: x[1], reverse=True)
-        
-        # Filter and Format Results
-        results = []
-        for dest_id, score in scores[:top_k]:
-            if score > 0.05: # Minimum relevance threshold
+            # Format Results (fresh dicts per query so callers can mutate them)
+            results = []
+            for dest_id, score in ranked[query]:
                 dest = self.destinations[dest_id]
                 results.append({
                     'id': dest_id,
@@ -155,8 +169,38 @@ class AIRecommender:
                     'eco_score': dest['eco_score'],
                     'description': dest['description']
                 })
+            batch.append(results)
                 
-        return results
+        return batch
+
+    def _rank(self, query, top_k):
+        """Score a query and return the top_k relevant (dest_id, similarity) pairs, best first"""
+        query_vec, query_norm = self._vectorize_query(query)
+        
+        if query_norm == 0:
+            return []
+            
+        # Dot products against every (unit) document vector at once: walk the
+        # postings of each query term and accumulate into a dense score list
+        dots = [0] * len(self.doc_ids)
+        for term, q_score in query_vec:
+            doc_indices, weights = self.postings[term]
+            for doc_index, d_score in zip(doc_indices, weights):
+                dots[doc_index] += q_score * d_score
+        
+        # Cosine Similarity = (A . B) / (||A|| * ||B||), with ||B|| already
+        # folded into the document weights. Only documents above the minimum
+        # relevance threshold are kept, so the sort sees candidates only.
+        scores = []
+        for dest_id, dot in zip(self.doc_ids, dots):
+            if dot:
+                score = dot / query_norm
+                if score > 0.05:
+                    scores.append((dest_id, score))
+            
+        # Top-k by similarity desc: a bounded heap selection instead of a full
+        # sort (ties keep catalogue order, same as a stable sort)
+        return heapq.nlargest(top_k, scores, key=itemgetter(1))
 
     def get_suggestions(self, context_type):
         """Get suggestions based on a type category (simple filter fallback)"""
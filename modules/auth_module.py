@@ -3,9 +3,11 @@ Authentication Module for EcoJourney
 Handles user registration, login, OTP verification, and session management
 """
 
-import random
+import hmac
+import os
+import secrets
 import string
-import re
+import threading
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import session, redirect, url_for, request
@@ -22,6 +24,7 @@ try:
         PASSWORD_REQUIRE_LOWERCASE,
         PASSWORD_REQUIRE_DIGIT,
         PASSWORD_REQUIRE_SPECIAL,
+        PASSWORD_HASH_ITERATIONS,
         CREATE_USERS_TABLE
     )
 except ImportError:
@@ -40,33 +43,97 @@ except ImportError:
     PASSWORD_REQUIRE_LOWERCASE = True
     PASSWORD_REQUIRE_DIGIT = True
     PASSWORD_REQUIRE_SPECIAL = True
+    PASSWORD_HASH_ITERATIONS = 600000
     CREATE_USERS_TABLE = ""
 
 # Try to import MySQL connector
 try:
     import mysql.connector
-    from mysql.connector import Error
+    from mysql.connector import Error, pooling
+    from mysql.connector.errors import PoolError
     MYSQL_AVAILABLE = True
 except ImportError:
     MYSQL_AVAILABLE = False
 
+# Try to import argon2 (memory-hard, C implementation) for password hashing
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHash
+    password_hasher = PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+# Keep OTPs in Redis (expiry handled by the key TTL) when REDIS_URL is set,
+# so issuing one does not cost a row lock and binlog write on users
+otp_store = None
+RedisError = ()  # nothing to catch unless redis is imported below
+if os.environ.get('REDIS_URL'):
+    try:
+        import redis
+        from redis import RedisError
+        otp_store = redis.from_url(os.environ['REDIS_URL'], decode_responses=True)
+    except ImportError:
+        print("Warning: REDIS_URL is set but redis is not installed. Run: pip install redis")
+
 
 # ==================== DATABASE CONNECTION ====================
 
+DB_POOL_SIZE = 16
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+
+def _get_db_pool():
+    """Create the shared connection pool on first use"""
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = pooling.MySQLConnectionPool(
+                    pool_name='ecojourney', pool_size=DB_POOL_SIZE, **MYSQL_CONFIG
+                )
+    return _db_pool
+
+
 def get_db_connection():
-    """Create and return a MySQL database connection"""
+    """
+    Return a MySQL database connection from the shared pool.
+    Release it with release_db_connection, which hands it back to the pool
+    instead of dropping the socket.
+    """
     if not MYSQL_AVAILABLE:
         print("Warning: mysql-connector-python not installed. Run: pip install mysql-connector-python")
         return None
     
     try:
-        connection = mysql.connector.connect(**MYSQL_CONFIG)
-        if connection.is_connected():
-            return connection
+        try:
+            connection = _get_db_pool().get_connection()
+        except PoolError:
+            # Every pooled connection is checked out; fall back to a direct one
+            connection = mysql.connector.connect(**MYSQL_CONFIG)
+        # The pool reconnects stale connections as it hands them out
+        return connection
     except Error as e:
         print(f"Database connection error: {e}")
         return None
-    return None
+
+
+def release_db_connection(connection, cursor=None):
+    """
+    Close the cursor and the connection. This runs even if the connection
+    dropped: a pooled connection only goes back to the pool when closed.
+    """
+    try:
+        if cursor is not None:
+            cursor.close()
+    except Error:
+        pass  # Connection already gone
+    try:
+        connection.close()
+    except Error:
+        pass  # A pooled connection is re-added even if its session reset fails
 
 
 def init_database():
@@ -75,6 +142,7 @@ def init_database():
     if not connection:
         return False
     
+    cursor = None
     try:
         cursor = connection.cursor()
         cursor.execute(CREATE_USERS_TABLE)
@@ -85,13 +153,30 @@ def init_database():
         print(f"Database initialization error: {e}")
         return False
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 # ==================== PASSWORD UTILITIES ====================
 
+# Character class bits for a single-pass password scan
+_UPPER, _LOWER, _DIGIT, _SPECIAL, _NON_ASCII = 1, 2, 4, 8, 16
+
+
+def _build_char_classes():
+    """Build the 256-entry byte -> class bits table used by validate_password_strength"""
+    table = bytearray(256)
+    for chars, bit in ((string.ascii_uppercase, _UPPER), (string.ascii_lowercase, _LOWER),
+                       (string.digits, _DIGIT), ('!@#$%^&*(),.?":{}|<>', _SPECIAL)):
+        for ch in chars:
+            table[ord(ch)] |= bit
+    for b in range(0x80, 0x100):
+        table[b] = _NON_ASCII
+    return bytes(table)
+
+
+_CHAR_CLASSES = _build_char_classes()
+
+
 def validate_password_strength(password):
     """
     Validate password meets strength requirements
@@ -100,27 +185,35 @@ def validate_password_strength(password):
     errors = []
     score = 0
     
+    # Map every byte to its class bits in C, then OR the distinct values
+    flags = 0
+    for bits in set(password.encode('utf-8', 'surrogatepass').translate(_CHAR_CLASSES)):
+        flags |= bits
+    # Non-ASCII decimal digits (e.g. Devanagari) also count as numbers
+    if flags & _NON_ASCII and not flags & _DIGIT and any(ch.isdecimal() for ch in password):
+        flags |= _DIGIT
+    
     if len(password) < PASSWORD_MIN_LENGTH:
         errors.append(f"Password must be at least {PASSWORD_MIN_LENGTH} characters")
     else:
         score += 20
     
-    if PASSWORD_REQUIRE_UPPERCASE and not re.search(r'[A-Z]', password):
+    if PASSWORD_REQUIRE_UPPERCASE and not flags & _UPPER:
         errors.append("Password must contain at least one uppercase letter")
     else:
         score += 20
     
-    if PASSWORD_REQUIRE_LOWERCASE and not re.search(r'[a-z]', password):
+    if PASSWORD_REQUIRE_LOWERCASE and not flags & _LOWER:
         errors.append("Password must contain at least one lowercase letter")
     else:
         score += 20
     
-    if PASSWORD_REQUIRE_DIGIT and not re.search(r'\d', password):
+    if PASSWORD_REQUIRE_DIGIT and not flags & _DIGIT:
         errors.append("Password must contain at least one number")
     else:
         score += 20
     
-    if PASSWORD_REQUIRE_SPECIAL and not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
+    if PASSWORD_REQUIRE_SPECIAL and not flags & _SPECIAL:
         errors.append("Password must contain at least one special character (!@#$%^&*)")
     else:
         score += 20
@@ -133,20 +226,31 @@ def validate_password_strength(password):
 
 
 def hash_password(password):
-    """Generate a secure hash of the password"""
-    return generate_password_hash(password, method='pbkdf2:sha256', salt_length=16)
+    """Generate a secure hash of the password (argon2id, or PBKDF2-SHA256 fallback)"""
+    if ARGON2_AVAILABLE:
+        return password_hasher.hash(password)
+    return generate_password_hash(
+        password, method=f'pbkdf2:sha256:{PASSWORD_HASH_ITERATIONS}', salt_length=16
+    )
 
 
 def verify_password(password, password_hash):
-    """Verify a password against its hash"""
+    """Verify a password against its hash (either scheme)"""
+    if password_hash.startswith('$argon2'):
+        if not ARGON2_AVAILABLE:
+            return False
+        try:
+            return password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHash):
+            return False
     return check_password_hash(password_hash, password)
 
 
 # ==================== OTP UTILITIES ====================
 
 def generate_otp():
-    """Generate a random 6-digit OTP code"""
-    return ''.join(random.choices(string.digits, k=OTP_LENGTH))
+    """Generate a random 6-digit OTP code from the OS CSPRNG"""
+    return f"{secrets.randbelow(10 ** OTP_LENGTH):0{OTP_LENGTH}d}"
 
 
 def get_otp_expiry():
@@ -162,7 +266,84 @@ def is_otp_valid(stored_otp, stored_expiry, provided_otp):
     if datetime.now() > stored_expiry:
         return False
     
-    return stored_otp == provided_otp
+    return _otp_matches(stored_otp, provided_otp)
+
+
+def _otp_matches(stored_otp, provided_otp):
+    """Constant-time OTP comparison (no early exit on the first differing digit)"""
+    if not isinstance(provided_otp, str):
+        return False
+    return hmac.compare_digest(stored_otp.encode(), provided_otp.encode())
+
+
+def _otp_key(user_id):
+    return f"otp:{user_id}"
+
+
+def save_otp(cursor, user_id, otp):
+    """
+    Store a fresh OTP for the user (Redis key with TTL, or the users row,
+    also used while Redis is unavailable).
+    Returns True when the users row was written and the caller must commit.
+    """
+    if otp_store is not None:
+        try:
+            otp_store.setex(_otp_key(user_id), OTP_EXPIRY_MINUTES * 60, otp)
+            return False
+        except RedisError as e:
+            print(f"OTP store error, keeping OTP on the users row: {e}")
+    update_query = "UPDATE users SET otp_code = %s, otp_expiry = %s WHERE id = %s"
+    cursor.execute(update_query, (otp, get_otp_expiry(), user_id))
+    return True
+
+
+def check_otp(user_id, stored_otp, stored_expiry, provided_otp):
+    """Check a provided OTP against wherever save_otp stored it"""
+    if otp_store is not None:
+        # An expired OTP is simply gone, so there is no expiry to compare
+        try:
+            redis_otp = otp_store.get(_otp_key(user_id))
+        except RedisError as e:
+            print(f"OTP store error: {e}")
+            redis_otp = None
+        if redis_otp is not None:
+            return _otp_matches(redis_otp, provided_otp)
+    # The row holds the OTP without Redis, or one issued while it was down
+    return is_otp_valid(stored_otp, stored_expiry, provided_otp)
+
+
+def discard_otp(user_id):
+    """Drop a used OTP from Redis (the users row is cleared by the caller's UPDATE)"""
+    if otp_store is not None:
+        try:
+            otp_store.delete(_otp_key(user_id))
+        except RedisError as e:
+            # The key still expires with its TTL
+            print(f"OTP store error: {e}")
+
+
+# ==================== USER LOOKUP QUERIES ====================
+
+def _identifier_lookup(columns):
+    """
+    Build a query finding a user by email or username.
+    Two indexed lookups joined by UNION ALL instead of `email = %s OR username = %s`,
+    so MySQL probes idx_email and idx_username rather than scanning; params are
+    (identifier, identifier) as before.
+    """
+    return (
+        f"SELECT {columns} FROM users WHERE email = %s "
+        f"UNION ALL SELECT {columns} FROM users WHERE username = %s LIMIT 1"
+    )
+
+
+USER_CREDENTIALS_BY_IDENTIFIER = _identifier_lookup(
+    'id, first_name, last_name, username, email, phone, password_hash, is_verified'
+)
+USER_OTP_STATUS_BY_IDENTIFIER = _identifier_lookup('id, otp_code, otp_expiry, is_verified')
+USER_OTP_BY_IDENTIFIER = _identifier_lookup('id, otp_code, otp_expiry')
+USER_EMAIL_BY_IDENTIFIER = _identifier_lookup('id, email')
+USER_ID_BY_IDENTIFIER = _identifier_lookup('id')
 
 
 # ==================== USER OPERATIONS ====================
@@ -172,31 +353,36 @@ def create_user(first_name, last_name, username, email, phone, password):
     Create a new user in the database
     Returns: (success: bool, message: str, user_id: int or None)
     """
+    # Hash the password before checking out a connection, so a pooled
+    # connection is not held idle for the duration of the key derivation
+    password_hash = hash_password(password)
+    
     connection = get_db_connection()
     if not connection:
         return (False, "Database connection failed", None)
     
+    cursor = None
     try:
         cursor = connection.cursor()
         
-        # Hash the password
-        password_hash = hash_password(password)
-        
-        # Generate OTP for verification
+        # Generate OTP for verification (kept on the row unless Redis holds OTPs)
         otp = generate_otp()
         otp_expiry = get_otp_expiry()
+        row_otp, row_otp_expiry = (None, None) if otp_store is not None else (otp, otp_expiry)
         
         # Insert user
         query = """
         INSERT INTO users (first_name, last_name, username, email, phone, password_hash, otp_code, otp_expiry)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
-        values = (first_name, last_name, username, email, phone, password_hash, otp, otp_expiry)
+        values = (first_name, last_name, username, email, phone, password_hash, row_otp, row_otp_expiry)
         
         cursor.execute(query, values)
         connection.commit()
         
         user_id = cursor.lastrowid
+        if otp_store is not None and save_otp(cursor, user_id, otp):
+            connection.commit()
         return (True, otp, user_id)  # Return OTP for display (simulated)
         
     except Error as e:
@@ -210,9 +396,7 @@ def create_user(first_name, last_name, username, email, phone, password):
                 return (False, "Phone number already registered", None)
         return (False, f"Registration failed: {error_msg}", None)
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def verify_user_otp(identifier, otp):
@@ -225,16 +409,12 @@ def verify_user_otp(identifier, otp):
     if not connection:
         return (False, "Database connection failed")
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
         # Find user by email or username
-        query = """
-        SELECT id, otp_code, otp_expiry, is_verified 
-        FROM users 
-        WHERE email = %s OR username = %s
-        """
-        cursor.execute(query, (identifier, identifier))
+        cursor.execute(USER_OTP_STATUS_BY_IDENTIFIER, (identifier, identifier))
         user = cursor.fetchone()
         
         if not user:
@@ -244,7 +424,7 @@ def verify_user_otp(identifier, otp):
             return (True, "Already verified")
         
         # Check OTP
-        if not is_otp_valid(user['otp_code'], user['otp_expiry'], otp):
+        if not check_otp(user['id'], user['otp_code'], user['otp_expiry'], otp):
             return (False, "Invalid or expired OTP")
         
         # Mark as verified and clear OTP
@@ -255,15 +435,14 @@ def verify_user_otp(identifier, otp):
         """
         cursor.execute(update_query, (user['id'],))
         connection.commit()
+        discard_otp(user['id'])
         
         return (True, "Account verified successfully")
         
     except Error as e:
         return (False, f"Verification failed: {e}")
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def authenticate_user(identifier, password):
@@ -275,16 +454,12 @@ def authenticate_user(identifier, password):
     if not connection:
         return (False, "Database connection failed", None, None)
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
         # Find user by email or username
-        query = """
-        SELECT id, first_name, last_name, username, email, phone, password_hash, is_verified 
-        FROM users 
-        WHERE (email = %s OR username = %s)
-        """
-        cursor.execute(query, (identifier, identifier))
+        cursor.execute(USER_CREDENTIALS_BY_IDENTIFIER, (identifier, identifier))
         user = cursor.fetchone()
         
         if not user:
@@ -296,14 +471,11 @@ def authenticate_user(identifier, password):
         if not user['is_verified']:
             return (False, "Account not verified. Please verify your email first.", None, None)
         
-        # Generate OTP for MFA
+        # Generate and store OTP for MFA; the only write in the login path,
+        # reached once the password and verification checks have passed
         otp = generate_otp()
-        otp_expiry = get_otp_expiry()
-        
-        # Store OTP
-        update_query = "UPDATE users SET otp_code = %s, otp_expiry = %s WHERE id = %s"
-        cursor.execute(update_query, (otp, otp_expiry, user['id']))
-        connection.commit()
+        if save_otp(cursor, user['id'], otp):
+            connection.commit()
         
         # Remove sensitive data
         del user['password_hash']
@@ -313,9 +485,7 @@ def authenticate_user(identifier, password):
     except Error as e:
         return (False, f"Authentication failed: {e}", None, None)
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def verify_login_otp(user_id, otp):
@@ -324,6 +494,7 @@ def verify_login_otp(user_id, otp):
     if not connection:
         return (False, "Database connection failed")
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
@@ -334,22 +505,23 @@ def verify_login_otp(user_id, otp):
         if not user:
             return (False, "User not found")
         
-        if not is_otp_valid(user['otp_code'], user['otp_expiry'], otp):
+        if not check_otp(user_id, user['otp_code'], user['otp_expiry'], otp):
             return (False, "Invalid or expired OTP")
         
-        # Clear OTP after successful verification
-        update_query = "UPDATE users SET otp_code = NULL, otp_expiry = NULL WHERE id = %s"
-        cursor.execute(update_query, (user_id,))
-        connection.commit()
+        # Clear OTP after successful verification (the row only holds one
+        # without Redis, or if it was issued while Redis was down)
+        discard_otp(user_id)
+        if user['otp_code'] is not None:
+            update_query = "UPDATE users SET otp_code = NULL, otp_expiry = NULL WHERE id = %s"
+            cursor.execute(update_query, (user_id,))
+            connection.commit()
         
         return (True, "Login successful")
         
     except Error as e:
         return (False, f"Verification failed: {e}")
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def request_password_reset(identifier):
@@ -361,11 +533,11 @@ def request_password_reset(identifier):
     if not connection:
         return (False, "Database connection failed", None)
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
-        query = "SELECT id, email FROM users WHERE email = %s OR username = %s"
-        cursor.execute(query, (identifier, identifier))
+        cursor.execute(USER_EMAIL_BY_IDENTIFIER, (identifier, identifier))
         user = cursor.fetchone()
         
         if not user:
@@ -373,20 +545,15 @@ def request_password_reset(identifier):
         
         # Generate OTP
         otp = generate_otp()
-        otp_expiry = get_otp_expiry()
-        
-        update_query = "UPDATE users SET otp_code = %s, otp_expiry = %s WHERE id = %s"
-        cursor.execute(update_query, (otp, otp_expiry, user['id']))
-        connection.commit()
+        if save_otp(cursor, user['id'], otp):
+            connection.commit()
         
         return (True, "OTP generated for password reset", otp)
         
     except Error as e:
         return (False, f"Request failed: {e}", None)
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def reset_password(identifier, otp, new_password):
@@ -398,17 +565,17 @@ def reset_password(identifier, otp, new_password):
     if not connection:
         return (False, "Database connection failed")
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
-        query = "SELECT id, otp_code, otp_expiry FROM users WHERE email = %s OR username = %s"
-        cursor.execute(query, (identifier, identifier))
+        cursor.execute(USER_OTP_BY_IDENTIFIER, (identifier, identifier))
         user = cursor.fetchone()
         
         if not user:
             return (False, "Account not found")
         
-        if not is_otp_valid(user['otp_code'], user['otp_expiry'], otp):
+        if not check_otp(user['id'], user['otp_code'], user['otp_expiry'], otp):
             return (False, "Invalid or expired OTP")
         
         # Validate new password
@@ -425,15 +592,17 @@ def reset_password(identifier, otp, new_password):
         """
         cursor.execute(update_query, (new_hash, user['id']))
         connection.commit()
+        discard_otp(user['id'])
         
         return (True, "Password reset successfully")
         
     except Error as e:
         return (False, f"Reset failed: {e}")
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
+
+
+UNIQUE_FIELDS = frozenset({'username', 'email', 'phone'})
 
 
 def check_unique(field, value):
@@ -445,26 +614,26 @@ def check_unique(field, value):
     if not connection:
         return (True, "Cannot verify - database unavailable")  # Allow in case of DB issues
     
+    cursor = None
     try:
         cursor = connection.cursor()
         
-        if field not in ['username', 'email', 'phone']:
+        if field not in UNIQUE_FIELDS:
             return (False, "Invalid field")
         
-        query = f"SELECT COUNT(*) FROM users WHERE {field} = %s"
+        # EXISTS stops at the first UNIQUE index hit instead of counting rows
+        query = f"SELECT EXISTS(SELECT 1 FROM users WHERE {field} = %s)"
         cursor.execute(query, (value,))
-        count = cursor.fetchone()[0]
+        exists = cursor.fetchone()[0]
         
-        if count > 0:
+        if exists:
             return (False, f"{field.capitalize()} already exists")
         return (True, f"{field.capitalize()} is available")
         
     except Error as e:
         return (True, "Cannot verify uniqueness")
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def resend_otp(identifier):
@@ -476,31 +645,26 @@ def resend_otp(identifier):
     if not connection:
         return (False, "Database connection failed", None)
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
-        query = "SELECT id FROM users WHERE email = %s OR username = %s"
-        cursor.execute(query, (identifier, identifier))
+        cursor.execute(USER_ID_BY_IDENTIFIER, (identifier, identifier))
         user = cursor.fetchone()
         
         if not user:
             return (False, "Account not found", None)
         
         otp = generate_otp()
-        otp_expiry = get_otp_expiry()
-        
-        update_query = "UPDATE users SET otp_code = %s, otp_expiry = %s WHERE id = %s"
-        cursor.execute(update_query, (otp, otp_expiry, user['id']))
-        connection.commit()
+        if save_otp(cursor, user['id'], otp):
+            connection.commit()
         
         return (True, "OTP resent", otp)
         
     except Error as e:
         return (False, f"Failed to resend OTP: {e}", None)
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def set_remember_token(user_id, token):
@@ -509,6 +673,7 @@ def set_remember_token(user_id, token):
     if not connection:
         return False
     
+    cursor = None
     try:
         cursor = connection.cursor()
         query = "UPDATE users SET remember_token = %s WHERE id = %s"
@@ -518,9 +683,7 @@ def set_remember_token(user_id, token):
     except Error:
         return False
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def get_user_by_remember_token(token):
@@ -529,6 +692,7 @@ def get_user_by_remember_token(token):
     if not connection:
         return None
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         query = """
@@ -541,9 +705,7 @@ def get_user_by_remember_token(token):
     except Error:
         return None
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 def clear_remember_token(user_id):
@@ -552,6 +714,7 @@ def clear_remember_token(user_id):
     if not connection:
         return False
     
+    cursor = None
     try:
         cursor = connection.cursor()
         query = "UPDATE users SET remember_token = NULL WHERE id = %s"
@@ -561,9 +724,7 @@ def clear_remember_token(user_id):
     except Error:
         return False
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
 
 
 # ==================== FLASK DECORATORS ====================
@@ -599,6 +760,7 @@ def get_user_details(user_id):
     if not connection:
         return None
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         # Fetch all user fields except password and sensitive tokens
@@ -613,6 +775,4 @@ def get_user_details(user_id):
         print(f"Error fetching user details: {e}")
         return None
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
@@ -1,6 +1,11 @@
 # Carbon Footprint Calculator
 # Uses fixed industry-standard emission factors (ISO 14001 aligned)
 
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache, partial
+from operator import itemgetter
+
 from modules.knowledge_base import (
     TRANSPORT_EMISSIONS, 
     ACCOMMODATION_EMISSIONS, 
@@ -9,6 +14,99 @@ from modules.knowledge_base import (
     ISO_14001_POINTS
 )
 
+# Display labels ("electric_car" -> "Electric Car") for every known
+# transport, accommodation and food key, built once at import
+DISPLAY_NAMES = {
+    key: key.replace("_", " ").title()
+    for emissions in (TRANSPORT_EMISSIONS, ACCOMMODATION_EMISSIONS, FOOD_EMISSIONS)
+    for key in emissions
+}
+
+
+def _display_name(key):
+    """Display label for a category key, formatting unknown keys on the fly"""
+    return DISPLAY_NAMES.get(key) or key.replace("_", " ").title()
+
+
+# Everything the shared alternatives kernel needs to know about a category,
+# as parallel tuples indexed by position: factors and display labels, plus
+# key -> index, the result key for the label and the index of the option
+# whose emissions are split between passengers (-1 if none)
+_CategoryTable = namedtuple('_CategoryTable', 'factors display index label shared_idx')
+
+
+def _category_table(emissions, label, shared_key=None):
+    """Build a _CategoryTable from a knowledge base emission factor dict"""
+    keys = tuple(emissions)
+    index = {key: i for i, key in enumerate(keys)}
+    return _CategoryTable(
+        factors=tuple(emissions.values()),
+        display=tuple(DISPLAY_NAMES[key] for key in keys),
+        index=index,
+        label=label,
+        shared_idx=index.get(shared_key, -1)
+    )
+
+
+_TRANSPORT_TABLE = _category_table(TRANSPORT_EMISSIONS, "mode", shared_key="car")
+_ACCOMMODATION_TABLE = _category_table(ACCOMMODATION_EMISSIONS, "type")
+_FOOD_TABLE = _category_table(FOOD_EMISSIONS, "type")
+
+# Best-case (lowest) factor per table, used for potential savings
+_MIN_TRANSPORT = min(_TRANSPORT_TABLE.factors)
+_MIN_ACCOMMODATION = min(_ACCOMMODATION_TABLE.factors)
+_MIN_FOOD = min(_FOOD_TABLE.factors)
+
+# Upper per-unit bounds for eco ratings A-D by category; anything above is E
+_ECO_RATING_THRESHOLDS = {
+    "transport": ((0.05, "A"), (0.1, "B"), (0.15, "C"), (0.2, "D")),
+    "accommodation": ((5, "A"), (10, "B"), (15, "C"), (25, "D")),
+    "food": ((3, "A"), (4, "B"), (5, "C"), (6, "D"))
+}
+
+# Trip eco-score (10 down to 3) for emissions up to each multiple of the
+# baseline footprint; anything above the last cut scores 2
+_ECO_SCORE_CUTS = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0)
+_ECO_SCORES = (10, 9, 8, 7, 6, 5, 4, 3)
+
+
+def _compute_alternatives(table, chosen_idx, total_emissions, multiplier, passengers=1):
+    """
+    Return the top 3 options in a category table that emit less than the
+    chosen one (by index, -1 for an unknown key), as result dicts ordered
+    by savings.
+    """
+    # Score all alternatives as plain tuples; result dicts are only built
+    # for the top 3 that are returned
+    shared_idx = table.shared_idx if passengers > 1 else -1
+    alternatives = []
+    for i, factor in enumerate(table.factors):
+        if i != chosen_idx:
+            alt_emissions = factor * multiplier
+            if i == shared_idx:
+                alt_emissions = alt_emissions / passengers
+            
+            savings = total_emissions - alt_emissions
+            if savings > 0:
+                alternatives.append((round(savings, 2), i, alt_emissions, savings))
+    
+    # Sort by (rounded) savings; itemgetter avoids a Python-level key call
+    alternatives.sort(key=itemgetter(0), reverse=True)
+    display = table.display
+    label = table.label
+    return [{
+        label: display[i],
+        "emissions": round(alt_emissions, 2),
+        "savings": rounded_savings,
+        "savings_percent": round((savings / total_emissions) * 100, 1) if total_emissions > 0 else 0
+    } for rounded_savings, i, alt_emissions, savings in alternatives[:3]]
+
+
+# The kernel specialised per category at import
+_transport_alternatives = partial(_compute_alternatives, _TRANSPORT_TABLE)
+_accommodation_alternatives = partial(_compute_alternatives, _ACCOMMODATION_TABLE)
+_food_alternatives = partial(_compute_alternatives, _FOOD_TABLE)
+
 def calculate_transport_emissions(transport_mode, distance_km, passengers=1):
     """
     Calculate transport carbon emissions.
@@ -21,38 +119,21 @@ def calculate_transport_emissions(transport_mode, distance_km, passengers=1):
     Returns:
         dict with emissions data and alternatives
     """
-    emission_factor = TRANSPORT_EMISSIONS.get(transport_mode, 0.171)
+    mode_idx = _TRANSPORT_TABLE.index.get(transport_mode, -1)
+    emission_factor = _TRANSPORT_TABLE.factors[mode_idx] if mode_idx >= 0 else 0.171
     total_emissions = emission_factor * distance_km
     
     # For car, divide by passengers for per-person calculation
     if transport_mode == "car" and passengers > 1:
         total_emissions = total_emissions / passengers
     
-    # Calculate all alternatives
-    alternatives = []
-    for mode, factor in TRANSPORT_EMISSIONS.items():
-        if mode != transport_mode:
-            alt_emissions = factor * distance_km
-            if mode == "car" and passengers > 1:
-                alt_emissions = alt_emissions / passengers
-            
-            savings = total_emissions - alt_emissions
-            if savings > 0:
-                alternatives.append({
-                    "mode": mode.replace("_", " ").title(),
-                    "emissions": round(alt_emissions, 2),
-                    "savings": round(savings, 2),
-                    "savings_percent": round((savings / total_emissions) * 100, 1)
-                })
-    
-    # Sort by savings
-    alternatives.sort(key=lambda x: x["savings"], reverse=True)
+    greener_alternatives = _transport_alternatives(mode_idx, total_emissions, distance_km, passengers)
     
     return {
-        "mode": transport_mode.replace("_", " ").title(),
+        "mode": _display_name(transport_mode),
         "distance_km": distance_km,
         "emissions_kg": round(total_emissions, 2),
-        "greener_alternatives": alternatives[:3],  # Top 3 alternatives
+        "greener_alternatives": greener_alternatives,  # Top 3 alternatives
         "eco_rating": get_eco_rating(total_emissions, "transport", distance_km)
     }
 
@@ -61,29 +142,17 @@ def calculate_accommodation_emissions(accommodation_type, nights):
     """
     Calculate accommodation carbon emissions.
     """
-    emission_factor = ACCOMMODATION_EMISSIONS.get(accommodation_type, 20.9)
+    type_idx = _ACCOMMODATION_TABLE.index.get(accommodation_type, -1)
+    emission_factor = _ACCOMMODATION_TABLE.factors[type_idx] if type_idx >= 0 else 20.9
     total_emissions = emission_factor * nights
     
-    alternatives = []
-    for acc_type, factor in ACCOMMODATION_EMISSIONS.items():
-        if acc_type != accommodation_type:
-            alt_emissions = factor * nights
-            savings = total_emissions - alt_emissions
-            if savings > 0:
-                alternatives.append({
-                    "type": acc_type.replace("_", " ").title(),
-                    "emissions": round(alt_emissions, 2),
-                    "savings": round(savings, 2),
-                    "savings_percent": round((savings / total_emissions) * 100, 1) if total_emissions > 0 else 0
-                })
-    
-    alternatives.sort(key=lambda x: x["savings"], reverse=True)
+    greener_alternatives = _accommodation_alternatives(type_idx, total_emissions, nights)
     
     return {
-        "type": accommodation_type.replace("_", " ").title(),
+        "type": _display_name(accommodation_type),
         "nights": nights,
         "emissions_kg": round(total_emissions, 2),
-        "greener_alternatives": alternatives[:3],
+        "greener_alternatives": greener_alternatives,
         "eco_rating": get_eco_rating(total_emissions, "accommodation", nights)
     }
 
@@ -92,29 +161,17 @@ def calculate_food_emissions(food_preference, days):
     """
     Calculate food-related carbon emissions.
     """
-    emission_factor = FOOD_EMISSIONS.get(food_preference, 5.1)
+    food_idx = _FOOD_TABLE.index.get(food_preference, -1)
+    emission_factor = _FOOD_TABLE.factors[food_idx] if food_idx >= 0 else 5.1
     total_emissions = emission_factor * days
     
-    alternatives = []
-    for food_type, factor in FOOD_EMISSIONS.items():
-        if food_type != food_preference:
-            alt_emissions = factor * days
-            savings = total_emissions - alt_emissions
-            if savings > 0:
-                alternatives.append({
-                    "type": food_type.replace("_", " ").title(),
-                    "emissions": round(alt_emissions, 2),
-                    "savings": round(savings, 2),
-                    "savings_percent": round((savings / total_emissions) * 100, 1) if total_emissions > 0 else 0
-                })
-    
-    alternatives.sort(key=lambda x: x["savings"], reverse=True)
+    greener_alternatives = _food_alternatives(food_idx, total_emissions, days)
     
     return {
-        "preference": food_preference.replace("_", " ").title(),
+        "preference": _display_name(food_preference),
         "days": days,
         "emissions_kg": round(total_emissions, 2),
-        "greener_alternatives": alternatives[:3],
+        "greener_alternatives": greener_alternatives,
         "eco_rating": get_eco_rating(total_emissions, "food", days)
     }
 
@@ -125,13 +182,8 @@ def get_eco_rating(emissions, category, unit_count):
     """
     per_unit = emissions / unit_count if unit_count > 0 else emissions
     
-    thresholds = {
-        "transport": [(0.05, "A"), (0.1, "B"), (0.15, "C"), (0.2, "D"), (float("inf"), "E")],
-        "accommodation": [(5, "A"), (10, "B"), (15, "C"), (25, "D"), (float("inf"), "E")],
-        "food": [(3, "A"), (4, "B"), (5, "C"), (6, "D"), (float("inf"), "E")]
-    }
-    
-    for threshold, rating in thresholds.get(category, thresholds["transport"]):
+    thresholds = _ECO_RATING_THRESHOLDS.get(category) or _ECO_RATING_THRESHOLDS["transport"]
+    for threshold, rating in thresholds:
         if per_unit <= threshold:
             return rating
     return "E"
@@ -153,32 +205,28 @@ def calculate_total_footprint(transport_mode, distance_km, accommodation_type,
     baseline_per_day = 5.5 * nights
     ratio = total_emissions / baseline_per_day if baseline_per_day > 0 else 1
     
-    if ratio <= 0.5:
-        eco_score = 10
-    elif ratio <= 0.75:
-        eco_score = 9
-    elif ratio <= 1.0:
-        eco_score = 8
-    elif ratio <= 1.25:
-        eco_score = 7
-    elif ratio <= 1.5:
-        eco_score = 6
-    elif ratio <= 2.0:
-        eco_score = 5
-    elif ratio <= 2.5:
-        eco_score = 4
-    elif ratio <= 3.0:
-        eco_score = 3
+    if ratio <= _ECO_SCORE_CUTS[-1]:
+        eco_score = _ECO_SCORES[bisect_left(_ECO_SCORE_CUTS, ratio)]
     else:
         eco_score = 2
     
     # Calculate potential savings
-    best_transport = min(TRANSPORT_EMISSIONS.values()) * distance_km
-    best_accommodation = min(ACCOMMODATION_EMISSIONS.values()) * nights
-    best_food = min(FOOD_EMISSIONS.values()) * nights
+    best_transport = _MIN_TRANSPORT * distance_km
+    best_accommodation = _MIN_ACCOMMODATION * nights
+    best_food = _MIN_FOOD * nights
     best_possible = best_transport + best_accommodation + best_food
     potential_savings = total_emissions - best_possible
     
+    # Share of each category, rounded once under a single zero check
+    if total_emissions > 0:
+        breakdown = {
+            "transport_percent": round((transport["emissions_kg"] / total_emissions) * 100, 1),
+            "accommodation_percent": round((accommodation["emissions_kg"] / total_emissions) * 100, 1),
+            "food_percent": round((food["emissions_kg"] / total_emissions) * 100, 1)
+        }
+    else:
+        breakdown = {"transport_percent": 0, "accommodation_percent": 0, "food_percent": 0}
+    
     return {
         "transport": transport,
         "accommodation": accommodation,
@@ -188,17 +236,15 @@ def calculate_total_footprint(transport_mode, distance_km, accommodation_type,
         "potential_savings_kg": round(potential_savings, 2),
         "trees_to_offset": round(total_emissions / 21, 1),  # Avg tree absorbs 21kg CO2/year
         "iso_14001_alignment": ISO_14001_POINTS,
-        "breakdown": {
-            "transport_percent": round((transport["emissions_kg"] / total_emissions) * 100, 1) if total_emissions > 0 else 0,
-            "accommodation_percent": round((accommodation["emissions_kg"] / total_emissions) * 100, 1) if total_emissions > 0 else 0,
-            "food_percent": round((food["emissions_kg"] / total_emissions) * 100, 1) if total_emissions > 0 else 0
-        }
+        "breakdown": breakdown
     }
 
 
+@lru_cache(maxsize=32)
 def get_destination_carbon_info(destination_id):
     """
     Get carbon-related information for a destination.
+    Cached per destination; the returned dict is shared, treat it as read-only.
     """
     if destination_id not in DESTINATIONS:
         return None
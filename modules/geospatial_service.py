@@ -4,14 +4,52 @@ Handles OpenStreetMap integration, geocoding, and distance calculations
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import hashlib
+import json
 import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from math import radians, cos, sin, asin, sqrt
 
+# Try to import orjson for faster parsing of large Overpass payloads
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Constants for Overpass API
 OVERPASS_URL = "http://overpass-api.de/api/interpreter"
 NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
 REVERSE_GEOCODE_URL = "https://nominatim.openstreetmap.org/reverse"
 
+# (connect, read) timeouts in seconds; Overpass queries take longer to run
+NOMINATIM_TIMEOUT = (3, 15)
+OVERPASS_TIMEOUT = (3, 30)
+
+# One keep-alive session for all OSM calls, so repeat lookups reuse the
+# TCP/TLS connection instead of handshaking on every request
+_http = requests.Session()
+_http.headers.update({'User-Agent': 'EcoJourney_StudentProject/1.0'})
+_http.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_http.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# 'all' sends one Overpass request per place type in parallel rather than
+# one combined union the server has to evaluate serially. The public server
+# allows about two concurrent slots per IP, so no more than that.
+_overpass_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='overpass')
+
+# Overpass "out body" order: nodes, then ways, then relations, each by id
+_ELEMENT_TYPE_ORDER = {'node': 0, 'way': 1, 'relation': 2}
+
+EARTH_RADIUS_KM = 6371 # Use 3956 for miles
+
 # Helper for Haversine distance
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -26,9 +64,141 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     dlat = lat2 - lat1 
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     c = 2 * asin(sqrt(a)) 
-    r = 6371 # Radius of earth in kilometers. Use 3956 for miles
+    r = EARTH_RADIUS_KM
     return c * r
 
+
+def haversine_batch(lat0, lon0, lats, lons):
+    """
+    Calculate the great circle distances from one origin to many points.
+    The origin's radians and cosine are computed once rather than per point.
+    """
+    lat0, lon0 = radians(lat0), radians(lon0)
+    cos_lat0 = cos(lat0)
+    
+    # Degrees are converted by map() in C and the formula runs inside a single
+    # comprehension, so the loop has no per-point append or local rebinding
+    return [
+        2 * asin(sqrt(sin((lat - lat0)/2)**2 + cos_lat0 * cos(lat) * sin((lon - lon0)/2)**2)) * EARTH_RADIUS_KM
+        for lat, lon in zip(map(radians, lats), map(radians, lons))
+    ]
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+# Geocoding results for a place name rarely change, keep them for a day
+_geocode_cache = TTLCache(maxsize=5000, ttl=86400)
+
+# Overpass results per ~1 km grid cell, kept for an hour. One 'all' entry for
+# a wide radius can hold thousands of places, so only a few hundred are kept
+# (and only the tags get_nearby_places reads, see _CACHED_TAG_KEYS).
+PLACES_CACHE_TTL = 3600
+_places_cache = TTLCache(maxsize=256, ttl=PLACES_CACHE_TTL)
+
+# Tags kept per place: the name plus those used for its type and category
+_CACHED_TAG_KEYS = ('name', 'natural', 'amenity', 'leisure', 'tourism', 'historic')
+
+# Half the diagonal of a 0.01 degree cell in metres (widest at the equator),
+# so a query around the cell centre covers the circle of any point in it
+_GRID_HALF_DIAGONAL_M = math.ceil(math.hypot(0.005, 0.005) * math.pi / 180 * EARTH_RADIUS_KM * 1000)
+
+# Second tier on disk, so restarts and other worker processes reuse results
+PLACES_CACHE_DIR = os.environ.get(
+    'ECOJOURNEY_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'ecojourney', 'places')
+)
+
+# Expired files are removed when read, and writes sweep the directory (at
+# most every PLACES_CACHE_PRUNE_SECONDS) for expired files and any beyond
+# the newest PLACES_CACHE_MAX_FILES
+PLACES_CACHE_MAX_FILES = 10000
+PLACES_CACHE_PRUNE_SECONDS = 600
+_places_cache_pruned_at = 0.0
+
+
+def _places_cache_path(cache_key):
+    digest = hashlib.sha1(repr(cache_key).encode('utf-8')).hexdigest()
+    return os.path.join(PLACES_CACHE_DIR, digest + '.json')
+
+
+def _read_places_file(cache_key):
+    """Return cached (lats, lons, tags) from disk, or None if missing or stale"""
+    path = _places_cache_path(cache_key)
+    try:
+        if time.time() - os.path.getmtime(path) > PLACES_CACHE_TTL:
+            os.remove(path)
+            return None
+        with open(path, encoding='utf-8') as f:
+            p_lats, p_lons, p_tags = json.load(f)
+        return tuple(p_lats), tuple(p_lons), tuple(p_tags)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _write_places_file(cache_key, candidates):
+    """Write candidates to disk atomically (temp file + os.replace); failures are ignored"""
+    tmp_path = None
+    try:
+        os.makedirs(PLACES_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=PLACES_CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(candidates, f)
+        os.replace(tmp_path, _places_cache_path(cache_key))
+    except OSError as e:
+        print(f"Places cache write error: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    
+    global _places_cache_pruned_at
+    if time.monotonic() - _places_cache_pruned_at >= PLACES_CACHE_PRUNE_SECONDS:
+        _places_cache_pruned_at = time.monotonic()
+        _prune_places_dir()
+
+
+def _prune_places_dir():
+    """Delete expired cache files (and stray temp files), then the oldest beyond PLACES_CACHE_MAX_FILES"""
+    try:
+        entries = [(entry.stat().st_mtime, entry.path) for entry in os.scandir(PLACES_CACHE_DIR) if entry.is_file()]
+    except OSError:
+        return
+    
+    expired_before = time.time() - PLACES_CACHE_TTL
+    entries.sort(reverse=True)
+    for i, (mtime, path) in enumerate(entries):
+        if mtime < expired_before or i >= PLACES_CACHE_MAX_FILES:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Already removed by another worker
+
+
 class GeospatialService:
     """Service for handling all geospatial operations"""
     
@@ -38,31 +208,33 @@ class GeospatialService:
         Search for a place using Nominatim API
         Returns a list of matching locations
         """
+        cache_key = query.strip().lower()
+        cached = _geocode_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         params = {
             'q': query,
             'format': 'json',
             'limit': 5,
             'addressdetails': 1
         }
-        headers = {
-            'User-Agent': 'EcoJourney_StudentProject/1.0'
-        }
         
         try:
-            response = requests.get(NOMINATIM_URL, params=params, headers=headers)
+            response = _http.get(NOMINATIM_URL, params=params, timeout=NOMINATIM_TIMEOUT)
             if response.status_code == 200:
-                results = response.json()
-                processed_results = []
+                results = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
                 
-                for res in results:
-                    processed_results.append({
-                        'name': res.get('display_name').split(',')[0],
-                        'full_name': res.get('display_name'),
-                        'lat': float(res.get('lat')),
-                        'lon': float(res.get('lon')),
-                        'type': res.get('type', 'unknown'),
-                        'importance': res.get('importance', 0)
-                    })
+                # Fields are indexed directly; split(',', 1) stops at the first comma
+                processed_results = [{
+                    'name': res['display_name'].split(',', 1)[0],
+                    'full_name': res['display_name'],
+                    'lat': float(res['lat']),
+                    'lon': float(res['lon']),
+                    'type': res.get('type', 'unknown'),
+                    'importance': res.get('importance', 0)
+                } for res in results]
+                _geocode_cache.set(cache_key, processed_results)
                 return processed_results
             return []
         except Exception as e:
@@ -76,6 +248,67 @@ class GeospatialService:
         radius in meters (default 5km)
         place_type: 'beach', 'mountain', 'temple', 'park', 'cultural', or 'all'
         """
+        # Snap the search centre to a 0.01 degree (~1 km) grid so requests for
+        # the same area share one cached Overpass response. The cell query is
+        # widened by half the cell diagonal, then distances are measured from
+        # the exact point and filtered back to the requested radius.
+        cache_key = (round(lat, 2), round(lon, 2), radius + _GRID_HALF_DIAGONAL_M, place_type)
+        candidates = _places_cache.get(cache_key)
+        if candidates is None:
+            candidates = _read_places_file(cache_key)
+            if candidates is None:
+                candidates = GeospatialService._fetch_places(*cache_key)
+                if candidates is None:
+                    return []
+                _write_places_file(cache_key, candidates)
+            _places_cache.set(cache_key, candidates)
+        
+        p_lats, p_lons, p_tags = candidates
+        if not p_tags:
+            return []
+        
+        # Distances for all candidates in one pass over the coordinate columns
+        distances = haversine_batch(lat, lon, p_lats, p_lons)
+        
+        # Loop invariants bound to locals once instead of looked up per place
+        max_km = radius / 1000
+        places = []
+        append = places.append
+        categorize = GeospatialService._categorize_place
+        for p_lat, p_lon, tags, dist in zip(p_lats, p_lons, p_tags, distances):
+            if dist > max_km:
+                continue
+            
+            # Determine type tag
+            p_type = 'attraction'
+            if 'natural' in tags:
+                p_type = tags['natural']
+            elif 'amenity' in tags:
+                p_type = tags['amenity']
+            elif 'leisure' in tags:
+                p_type = tags['leisure']
+            elif 'tourism' in tags:
+                p_type = tags['tourism']
+                
+            append({
+                'name': tags['name'],
+                'lat': p_lat,
+                'lon': p_lon,
+                'type': p_type,
+                'distance_km': round(dist, 2),
+                'category': categorize(tags)
+            })
+        
+        # Sort by distance
+        places.sort(key=itemgetter('distance_km'))
+        return places
+
+    @staticmethod
+    def _fetch_places(lat, lon, radius, place_type):
+        """
+        Query Overpass and return the named elements as parallel
+        (lats, lons, tags) tuples, or None if the request failed
+        """
         # Define Overpass QL queries for different types
         queries = {
             'beach': f"""
@@ -100,74 +333,107 @@ class GeospatialService:
             """
         }
         
-        # Construct the query
-        ql_query = "[out:json];("
         if place_type == 'all':
-            for q in queries.values():
-                ql_query += q
+            sub_queries = list(queries.values())
         elif place_type in queries:
-            ql_query += queries[place_type]
-        ql_query += ");out body;>;out skel qt;"
+            sub_queries = [queries[place_type]]
+        else:
+            return (), (), ()
         
         try:
-            response = requests.get(OVERPASS_URL, params={'data': ql_query})
-            if response.status_code == 200:
-                data = response.json()
-                places = []
+            if len(sub_queries) == 1:
+                elements = GeospatialService._fetch_named_elements(sub_queries[0])
+            else:
+                elements = GeospatialService._fetch_named_elements_concurrently(sub_queries)
+                if elements is None:
+                    # A subquery was refused (e.g. 429 when the server's slots
+                    # are busy): fall back to the single combined query
+                    elements = GeospatialService._fetch_named_elements("".join(sub_queries))
+            
+            if elements is None:
+                return None
+            p_lats, p_lons, p_tags = [], [], []
+            
+            for element in elements:
+                tags = element['tags']
+                tags = {key: tags[key] for key in _CACHED_TAG_KEYS if key in tags}
                 
-                for element in data.get('elements', []):
-                    if 'tags' in element and 'name' in element['tags']:
-                        # Determine lat/lon based on element type
-                        p_lat = element.get('lat')
-                        p_lon = element.get('lon')
-                        
-                        if not p_lat and 'center' in element:
-                             p_lat = element['center']['lat']
-                             p_lon = element['center']['lon']
-                             
-                        if p_lat and p_lon:
-                            dist = haversine_distance(lat, lon, p_lat, p_lon)
-                            
-                            # Determine type tag
-                            p_type = 'attraction'
-                            tags = element['tags']
-                            if 'natural' in tags:
-                                p_type = tags['natural']
-                            elif 'amenity' in tags:
-                                p_type = tags['amenity']
-                            elif 'leisure' in tags:
-                                p_type = tags['leisure']
-                            elif 'tourism' in tags:
-                                p_type = tags['tourism']
-                                
-                            places.append({
-                                'name': tags['name'],
-                                'lat': p_lat,
-                                'lon': p_lon,
-                                'type': p_type,
-                                'distance_km': round(dist, 2),
-                                'category': GeospatialService._categorize_place(tags)
-                            })
+                # Determine lat/lon based on element type
+                p_lat = element.get('lat')
+                p_lon = element.get('lon')
                 
-                # Sort by distance
-                places.sort(key=lambda x: x['distance_km'])
-                return places
-            return []
+                if not p_lat and 'center' in element:
+                    center = element['center']
+                    p_lat = center['lat']
+                    p_lon = center['lon']
+                    
+                if p_lat and p_lon:
+                    p_lats.append(p_lat)
+                    p_lons.append(p_lon)
+                    p_tags.append(tags)
+            return tuple(p_lats), tuple(p_lons), tuple(p_tags)
         except Exception as e:
             print(f"Overpass API error: {e}")
-            return []
+            return None
+
+    @staticmethod
+    def _fetch_named_elements_concurrently(sub_queries):
+        """
+        Run the subqueries on the Overpass pool and merge their named elements
+        as the combined query would return them, or None if any part failed
+        """
+        try:
+            results = list(_overpass_pool.map(GeospatialService._fetch_named_elements, sub_queries))
+        except requests.RequestException as e:
+            print(f"Overpass API error: {e}")
+            return None
+        if any(result is None for result in results):
+            return None
+        
+        # Merge, dropping elements matched by more than one subquery,
+        # and restore the order the combined query returned them in
+        seen = set()
+        elements = []
+        for result in results:
+            for element in result:
+                key = (element.get('type'), element.get('id'))
+                if key not in seen:
+                    seen.add(key)
+                    elements.append(element)
+        elements.sort(key=lambda e: (_ELEMENT_TYPE_ORDER.get(e.get('type'), 3), e.get('id', 0)))
+        return elements
+
+    @staticmethod
+    def _fetch_named_elements(sub_query):
+        """
+        Run one Overpass union query and return its named elements, or None on
+        a bad status or a runtime error (e.g. a timeout or out of memory, which
+        Overpass reports as a 200 with a "remark" and truncated elements)
+        """
+        ql_query = "[out:json];(" + sub_query + ");out body;>;out skel qt;"
+        response = _http.get(OVERPASS_URL, params={'data': ql_query}, timeout=OVERPASS_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        data = orjson.loads(response.content) if ORJSON_AVAILABLE else response.json()
+        if data.get('remark'):
+            print(f"Overpass API error: {data['remark']}")
+            return None
+        
+        # Skip unnamed elements (most of the "skel" output) first
+        return [
+            element for element in data.get('elements', [])
+            if 'name' in (element.get('tags') or ())
+        ]
 
     @staticmethod
     def _categorize_place(tags):
         """Helper to categorize place based on OSM tags"""
-        if 'natural' in tags and tags['natural'] == 'beach':
-            return 'beach'
-        if 'natural' in tags and tags['natural'] == 'peak':
-            return 'mountain'
-        if 'amenity' in tags and tags['amenity'] == 'place_of_worship':
-            return 'temple'
-        if 'leisure' in tags and tags['leisure'] in ['park', 'nature_reserve']:
-            return 'park'
+        # One table probe per tag key, in priority order
+        get = tags.get
+        for key in _CATEGORY_TAG_KEYS:
+            category = _CATEGORY_BY_TAG.get((key, get(key)))
+            if category:
+                return category
         if 'tourism' in tags or 'historic' in tags:
             return 'cultural'
         return 'other'
@@ -176,28 +442,47 @@ class GeospatialService:
     def get_trip_recommendation(distance_km):
         """
         Provide sustainability recommendation based on distance
+        (one of four shared, read-only dicts)
         """
         if distance_km < 50:
-            return {
-                'mode': 'Bicycle/Electric Vehicle',
-                'impact': 'Very Low',
-                'message': 'Great for a local cycling trip or EV drive!'
-            }
+            return _TRIP_LOCAL
         elif distance_km < 300:
-            return {
-                'mode': 'Electric Train/Bus',
-                'impact': 'Low',
-                'message': 'Perfect distance for a scenic train or bus ride.'
-            }
+            return _TRIP_REGIONAL
         elif distance_km < 1000:
-            return {
-                'mode': 'Train',
-                'impact': 'Medium',
-                'message': 'Consider an overnight train to reduce carbon footprint.'
-            }
+            return _TRIP_DOMESTIC
         else:
-            return {
-                'mode': 'Train/Direct Flight',
-                'impact': 'High',
-                'message': 'Long distance - try to stay longer to offset travel carbon.'
-            }
+            return _TRIP_LONG_HAUL
+
+
+# Place category by (OSM tag key, value); keys are probed in the order of
+# _CATEGORY_TAG_KEYS so a beach that is also a place of worship stays a beach
+_CATEGORY_BY_TAG = {
+    ('natural', 'beach'): 'beach',
+    ('natural', 'peak'): 'mountain',
+    ('amenity', 'place_of_worship'): 'temple',
+    ('leisure', 'park'): 'park',
+    ('leisure', 'nature_reserve'): 'park'
+}
+_CATEGORY_TAG_KEYS = ('natural', 'amenity', 'leisure')
+
+# Trip recommendations by distance band, built once rather than per call
+_TRIP_LOCAL = {
+    'mode': 'Bicycle/Electric Vehicle',
+    'impact': 'Very Low',
+    'message': 'Great for a local cycling trip or EV drive!'
+}
+_TRIP_REGIONAL = {
+    'mode': 'Electric Train/Bus',
+    'impact': 'Low',
+    'message': 'Perfect distance for a scenic train or bus ride.'
+}
+_TRIP_DOMESTIC = {
+    'mode': 'Train',
+    'impact': 'Medium',
+    'message': 'Consider an overnight train to reduce carbon footprint.'
+}
+_TRIP_LONG_HAUL = {
+    'mode': 'Train/Direct Flight',
+    'impact': 'High',
+    'message': 'Long distance - try to stay longer to offset travel carbon.'
+}
@@ -193,6 +193,25 @@ DESTINATIONS = {
     }
 }
 
+# Column views of DESTINATIONS (same order as the dict) for bulk numeric
+# queries; string and list fields stay in the per-destination dicts (DEST_META)
+DEST_IDS = tuple(DESTINATIONS)
+DEST_META = tuple(DESTINATIONS.values())
+DEST_ECO_SCORES = tuple(d["eco_score"] for d in DEST_META)
+DEST_DISTANCES = tuple(d["distance_from_delhi"] for d in DEST_META)
+
+# Lowercase month names as used in best_season, and each destination's
+# best_season as a 12-bit mask (bit m-1 set for month m)
+MONTH_KEYS = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december"
+)
+DEST_BEST_SEASON_MASKS = tuple(
+    sum(1 << i for i, month in enumerate(MONTH_KEYS) if month in d["best_season"])
+    for d in DEST_META
+)
+BEST_SEASON_MASKS = dict(zip(DEST_IDS, DEST_BEST_SEASON_MASKS))
+
 # Transport emission factors (kg CO2 per km per person)
 TRANSPORT_EMISSIONS = {
     "flight": 0.255,
@@ -237,6 +256,28 @@ FESTIVAL_PERIODS = {
     "holi": {"month": 3, "weeks": [2, 3], "multiplier": 1.4}
 }
 
+# Month-indexed views of SEASONAL_PRICING (index 0 unused): season key or
+# None, and its price multiplier (1.0 where no season applies). The first
+# season listing a month wins, as in a scan of the dict.
+MONTH_SEASON = [None] * 13
+MONTH_MULTIPLIER = [1.0] * 13
+for _season, _data in SEASONAL_PRICING.items():
+    for _month in _data["months"]:
+        if MONTH_SEASON[_month] is None:
+            MONTH_SEASON[_month] = _season
+            MONTH_MULTIPLIER[_month] = _data["multiplier"]
+MONTH_SEASON = tuple(MONTH_SEASON)
+MONTH_MULTIPLIER = tuple(MONTH_MULTIPLIER)
+
+# FESTIVAL_PERIODS by [month][week of month 1-5]: festival key or None
+FESTIVAL_WEEK = [[None] * 6 for _ in range(13)]
+for _festival, _data in FESTIVAL_PERIODS.items():
+    for _week in _data["weeks"]:
+        if FESTIVAL_WEEK[_data["month"]][_week] is None:
+            FESTIVAL_WEEK[_data["month"]][_week] = _festival
+FESTIVAL_WEEK = tuple(map(tuple, FESTIVAL_WEEK))
+del _season, _festival, _data, _month, _week
+
 # UNWTO Sustainable Development Goals mapping
 UNWTO_GOALS = {
     "local_economy": "Support local communities and reduce economic leakage",
@@ -2,41 +2,97 @@
 # Logic-based pricing rules without real-time APIs
 
 from datetime import datetime
-from modules.knowledge_base import SEASONAL_PRICING, FESTIVAL_PERIODS, DESTINATIONS
+from functools import lru_cache
+from modules.knowledge_base import (
+    SEASONAL_PRICING,
+    FESTIVAL_PERIODS,
+    DESTINATIONS,
+    BEST_SEASON_MASKS,
+    MONTH_SEASON,
+    MONTH_MULTIPLIER,
+    FESTIVAL_WEEK
+)
 
-def get_current_season():
+# Season and festival info by month, built once at import so lookups are a
+# single dict probe. The info dicts are shared between calls: read-only.
+_SHOULDER_DEFAULT = {"season": "shoulder", "label": "Shoulder Season", "multiplier": 1.0}
+_MONTH_SEASON = {
+    month: {
+        "season": season,
+        "label": SEASONAL_PRICING[season]["label"],
+        "multiplier": MONTH_MULTIPLIER[month]
+    }
+    for month, season in enumerate(MONTH_SEASON) if season is not None
+}
+
+# Festival display names ("diwali_week" -> "Diwali Week")
+_FESTIVAL_DISPLAY = {festival: festival.replace("_", " ").title() for festival in FESTIVAL_PERIODS}
+
+_FESTIVAL_INFO = {
+    festival: {
+        "is_festival": True,
+        "festival_name": _FESTIVAL_DISPLAY[festival],
+        "multiplier": data["multiplier"]
+    }
+    for festival, data in FESTIVAL_PERIODS.items()
+}
+_NO_FESTIVAL = {"is_festival": False, "festival_name": None, "multiplier": 1.0}
+
+# First festival (in FESTIVAL_PERIODS order) falling in each month
+_MONTH_FESTIVAL = {}
+for _festival, _data in FESTIVAL_PERIODS.items():
+    _MONTH_FESTIVAL.setdefault(_data["month"], _FESTIVAL_INFO[_festival])
+_NO_MONTH_FESTIVAL = {"is_festival": False, "multiplier": 1.0}
+del _festival, _data
+
+
+def _final_multiplier(season_info, festival_info):
+    """Season multiplier, raised to the festival premium if one applies"""
+    final_multiplier = season_info["multiplier"]
+    if festival_info["is_festival"]:
+        final_multiplier = max(final_multiplier, festival_info["multiplier"])
+    return final_multiplier
+
+
+# Rounded price multiplier for months 1-12 (the same for every destination)
+# and the month indices 0-11 ordered cheapest first, ties in calendar order
+_MONTH_PRICE_MULTIPLIERS = tuple(
+    round(_final_multiplier(
+        _MONTH_SEASON.get(month, _SHOULDER_DEFAULT),
+        _MONTH_FESTIVAL.get(month, _NO_MONTH_FESTIVAL)
+    ), 2)
+    for month in range(1, 13)
+)
+_MONTHS_BY_PRICE = tuple(sorted(range(12), key=_MONTH_PRICE_MULTIPLIERS.__getitem__))
+
+# English display names (not calendar.month_name, which follows the locale)
+_MONTH_NAMES = (
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
+
+
+def get_current_season(today=None):
     """
     Determine current season based on month.
+    today: date/datetime to use instead of reading the clock
     """
-    current_month = datetime.now().month
-    
-    for season, data in SEASONAL_PRICING.items():
-        if current_month in data["months"]:
-            return {
-                "season": season,
-                "label": data["label"],
-                "multiplier": data["multiplier"]
-            }
-    
-    return {"season": "shoulder", "label": "Shoulder Season", "multiplier": 1.0}
+    today = today or datetime.now()
+    return _MONTH_SEASON.get(today.month, _SHOULDER_DEFAULT)
 
 
-def check_festival_period():
+def check_festival_period(today=None):
     """
     Check if current date falls in a festival period.
+    today: date/datetime to use instead of reading the clock
     """
-    current_month = datetime.now().month
-    current_week = (datetime.now().day - 1) // 7 + 1
-    
-    for festival, data in FESTIVAL_PERIODS.items():
-        if current_month == data["month"] and current_week in data["weeks"]:
-            return {
-                "is_festival": True,
-                "festival_name": festival.replace("_", " ").title(),
-                "multiplier": data["multiplier"]
-            }
+    # One clock read, so month and week always come from the same day
+    today = today or datetime.now()
+    current_month = today.month
+    current_week = (today.day - 1) // 7 + 1
     
-    return {"is_festival": False, "festival_name": None, "multiplier": 1.0}
+    festival = FESTIVAL_WEEK[current_month][current_week]
+    return _FESTIVAL_INFO[festival] if festival is not None else _NO_FESTIVAL
 
 
 def calculate_price_level(destination_id, travel_month=None):
@@ -48,13 +104,22 @@ def calculate_price_level(destination_id, travel_month=None):
         travel_month: Target month for travel (1-12), defaults to current
     
     Returns:
-        Price analysis with recommendations
+        Price analysis with recommendations (cached per destination and
+        month; the dict is shared, treat it as read-only)
+    """
+    target_month = travel_month if travel_month else datetime.now().month
+    return _calculate_price_level(destination_id, target_month)
+
+
+@lru_cache(maxsize=4096)
+def _calculate_price_level(destination_id, target_month):
+    """
+    Cached price analysis for a resolved month.
     """
     if destination_id not in DESTINATIONS:
         return None
     
     dest = DESTINATIONS[destination_id]
-    target_month = travel_month if travel_month else datetime.now().month
     
     # Base price levels (relative indices)
     base_prices = {
@@ -65,33 +130,12 @@ def calculate_price_level(destination_id, travel_month=None):
     
     base_price = base_prices.get(dest["budget_level"], 200)
     
-    # Determine season for target month
-    for season, data in SEASONAL_PRICING.items():
-        if target_month in data["months"]:
-            season_info = {
-                "season": season,
-                "label": data["label"],
-                "multiplier": data["multiplier"]
-            }
-            break
-    else:
-        season_info = {"season": "shoulder", "label": "Shoulder Season", "multiplier": 1.0}
-    
-    # Check for festival premium
-    festival_info = {"is_festival": False, "multiplier": 1.0}
-    for festival, data in FESTIVAL_PERIODS.items():
-        if target_month == data["month"]:
-            festival_info = {
-                "is_festival": True,
-                "festival_name": festival.replace("_", " ").title(),
-                "multiplier": data["multiplier"]
-            }
-            break
+    # Season and festival premium for target month
+    season_info = _MONTH_SEASON.get(target_month, _SHOULDER_DEFAULT)
+    festival_info = _MONTH_FESTIVAL.get(target_month, _NO_MONTH_FESTIVAL)
     
     # Calculate final price index
-    final_multiplier = season_info["multiplier"]
-    if festival_info["is_festival"]:
-        final_multiplier = max(final_multiplier, festival_info["multiplier"])
+    final_multiplier = _final_multiplier(season_info, festival_info)
     
     final_price_index = base_price * final_multiplier
     
@@ -121,63 +165,77 @@ def calculate_price_level(destination_id, travel_month=None):
     }
 
 
+@lru_cache(maxsize=256)
 def get_best_time_to_book(destination_id):
     """
     Find the best months to book for a destination.
+    Depends only on static knowledge base data (all twelve months are
+    analysed, whatever the current month), so results are cached per
+    destination; the dict is shared, treat it as read-only.
     """
     if destination_id not in DESTINATIONS:
         return None
     
     dest = DESTINATIONS[destination_id]
-    month_names = [
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ]
+    month_names = _MONTH_NAMES
     
-    monthly_analysis = []
-    
-    for month in range(1, 13):
-        price_info = calculate_price_level(destination_id, month)
-        month_name = month_names[month - 1]
-        
-        # Check if it's in best season
-        is_best_season = month_name.lower() in dest["best_season"]
-        
-        monthly_analysis.append({
-            "month": month,
-            "month_name": month_name,
-            "price_level": price_info["price_level"],
-            "price_index": price_info["price_index"],
-            "multiplier": price_info["multiplier"],
-            "is_best_season": is_best_season,
-            "season_label": price_info["season"]["label"],
-            "festival": price_info["festival"]["festival_name"] if price_info["festival"]["is_festival"] else None
-        })
+    # Per-month columns (index 0-11); selection below works on these and
+    # the month dicts are only assembled at the end
+    best_season_mask = BEST_SEASON_MASKS[destination_id]
+    price_infos = [calculate_price_level(destination_id, month) for month in range(1, 13)]
+    is_best = [bool(best_season_mask >> i & 1) for i in range(12)]
+    best_value_idx = _best_value_month_indices(best_season_mask)
     
-    # Find best value months (good weather + lower prices)
-    best_value_months = [
-        m for m in monthly_analysis 
-        if m["is_best_season"] and m["multiplier"] <= 1.2
-    ]
+    monthly_analysis = [{
+        "month": i + 1,
+        "month_name": month_names[i],
+        "price_level": price_info["price_level"],
+        "price_index": price_info["price_index"],
+        "multiplier": price_info["multiplier"],
+        "is_best_season": is_best[i],
+        "season_label": price_info["season"]["label"],
+        "festival": price_info["festival"]["festival_name"] if price_info["festival"]["is_festival"] else None
+    } for i, price_info in enumerate(price_infos)]
     
-    # If no best value, find lowest price months
-    if not best_value_months:
-        monthly_analysis_sorted = sorted(monthly_analysis, key=lambda x: x["multiplier"])
-        best_value_months = monthly_analysis_sorted[:3]
+    best_value_months = [monthly_analysis[i] for i in best_value_idx]
     
     # Find cheapest month overall
-    cheapest = min(monthly_analysis, key=lambda x: x["multiplier"])
+    cheapest = monthly_analysis[_MONTHS_BY_PRICE[0]]
     
     return {
         "destination": dest["name"],
         "monthly_analysis": monthly_analysis,
-        "best_value_months": [m["month_name"] for m in best_value_months],
+        "best_value_months": [month_names[i] for i in best_value_idx],
         "cheapest_month": cheapest["month_name"],
         "cheapest_multiplier": cheapest["multiplier"],
         "booking_advice": generate_booking_advice(dest, best_value_months, cheapest)
     }
 
 
+def _best_value_month_indices(best_season_mask):
+    """
+    Month indices (0-11) of the best value months for a best_season mask.
+    """
+    # Find best value months (good weather + lower prices)
+    best_value_idx = [
+        i for i, multiplier in enumerate(_MONTH_PRICE_MULTIPLIERS)
+        if multiplier <= 1.2 and best_season_mask >> i & 1
+    ]
+    
+    # If no best value, find lowest price months; the price order of the
+    # months is fixed, so it is precomputed rather than sorted per call
+    return best_value_idx or _MONTHS_BY_PRICE[:3]
+
+
+def _top_best_value_months(destination_id, k=2):
+    """
+    First k best value month names, as in get_best_time_to_book, without
+    building the full monthly analysis.
+    """
+    best_value_idx = _best_value_month_indices(BEST_SEASON_MASKS[destination_id])
+    return [_MONTH_NAMES[i] for i in best_value_idx[:k]]
+
+
 def generate_booking_advice(destination, best_value_months, cheapest):
     """
     Generate personalized booking advice.
@@ -199,31 +257,40 @@ def generate_booking_advice(destination, best_value_months, cheapest):
     return advice
 
 
-def get_pricing_comparison(destination_ids):
+def get_pricing_comparison(destination_ids, today=None):
     """
     Compare pricing across multiple destinations.
+    today: date/datetime to use instead of reading the clock
+    """
+    today = today or datetime.now()
+    return _get_pricing_comparison(tuple(destination_ids), today.month)
+
+
+@lru_cache(maxsize=64)
+def _get_pricing_comparison(destination_ids, current_month):
+    """
+    Cached comparison, keyed by the destinations and the month it is run in.
     """
-    current_month = datetime.now().month
     comparisons = []
     
     for dest_id in destination_ids:
         if dest_id in DESTINATIONS:
             price_info = calculate_price_level(dest_id, current_month)
-            best_time = get_best_time_to_book(dest_id)
             
             comparisons.append({
                 "destination_id": dest_id,
                 "destination_name": price_info["destination"],
                 "current_price_level": price_info["price_level"],
                 "current_multiplier": price_info["multiplier"],
-                "best_value_months": best_time["best_value_months"][:2],
+                "best_value_months": _top_best_value_months(dest_id),
                 "eco_score": DESTINATIONS[dest_id]["eco_score"]
             })
     
-    # Sort by price index (lower is better value)
-    comparisons.sort(key=lambda x: x["current_multiplier"])
+    # Ordered by price (lower is better value): the multiplier depends only
+    # on the month (_MONTH_PRICE_MULTIPLIERS), so every entry ties and the
+    # stable sort this replaces kept the requested order as it is
     
     return {
-        "current_month": datetime.now().strftime("%B"),
+        "current_month": _MONTH_NAMES[current_month - 1],
         "comparisons": comparisons
     }
@@ -1,10 +1,55 @@
 # Rule-Based Recommendation Engine
 # No ML training - Pure decision logic
 
-from modules.knowledge_base import DESTINATIONS
+import heapq
+import math
+from dataclasses import dataclass
+
+from modules.knowledge_base import (
+    DESTINATIONS,
+    DEST_IDS,
+    DEST_DISTANCES,
+    DEST_ECO_SCORES,
+    DEST_BEST_SEASON_MASKS
+)
 from datetime import datetime
 
-def get_recommendations(budget, travel_type, duration, sustainability_pref):
+# Integer codes for the categorical features: budget levels are ordered
+# (unknown levels get -2, unknown queries -1, so neither matches), each
+# travel type gets one bit
+_BUDGET_CODES = {"low": 0, "medium": 1, "high": 2}
+_TYPE_BITS = {}
+for _d in DESTINATIONS.values():
+    for _t in _d["type"]:
+        _TYPE_BITS.setdefault(_t, 1 << len(_TYPE_BITS))
+_UNIVERSAL_TYPES_MASK = _TYPE_BITS.get("nature", 0) | _TYPE_BITS.get("relaxation", 0)
+
+
+def _distance_band(distance):
+    """0: <= 500 km, 1: <= 1000 km, 2: <= 2500 km, 3: further"""
+    if distance <= 500:
+        return 0
+    if distance <= 1000:
+        return 1
+    if distance <= 2500:
+        return 2
+    return 3
+
+
+# Scoring features for every destination, extracted once at import as
+# parallel tuples of small ints (alongside knowledge_base's DEST_* columns)
+# so the ranking loop doesn't walk the nested dicts
+_DEST_BUDGETS = tuple(d["budget_level"] for d in DESTINATIONS.values())
+_DEST_BUDGET_CODES = tuple(_BUDGET_CODES.get(level, -2) for level in _DEST_BUDGETS)
+_DEST_TYPE_MASKS = tuple(sum({_TYPE_BITS[t] for t in d["type"]}) for d in DESTINATIONS.values())
+_DEST_DISTANCE_BANDS = tuple(map(_distance_band, DEST_DISTANCES))
+del _d, _t
+
+# Match reason flags set by the scoring kernel
+(_R_BUDGET_MATCH, _R_WITHIN_BUDGET, _R_TYPE_MATCH, _R_SHORT_TRIP, _R_MEDIUM_TRIP,
+ _R_LONG_TRIP, _R_ECO_MATCH, _R_GOOD_ECO, _R_IN_SEASON) = (1 << n for n in range(9))
+
+def get_recommendations(budget, travel_type, duration, sustainability_pref, today=None):
     """
     Generate personalized travel recommendations using rule-based logic.
     
@@ -13,83 +58,217 @@ def get_recommendations(budget, travel_type, duration, sustainability_pref):
         travel_type: 'adventure', 'nature', 'spiritual', 'cultural', 'beach', 'relaxation'
         duration: number of days (int)
         sustainability_pref: 1-10 scale (int)
+        today: date/datetime to use instead of reading the clock
     
     Returns:
         List of recommended destinations with scores
     """
+    month_bit = 1 << ((today or datetime.now()).month - 1)
+    
+    scores, reason_flags = _score_destinations(
+        budget, travel_type, duration, sustainability_pref, month_bit
+    )
+    
+    # Top 5 by score descending; nlargest keeps catalogue order for ties,
+    # like a stable sort, without sorting every destination
+    top = heapq.nlargest(5, range(len(scores)), key=scores.__getitem__)
+    
+    # Compile recommendations for the top 5 only
     recommendations = []
-    current_month = datetime.now().strftime("%B").lower()
+    for i in top:
+        dest_id = DEST_IDS[i]
+        dest = DESTINATIONS[dest_id]
+        eco_score = DEST_ECO_SCORES[i]
+        recommendations.append({
+            "id": dest_id,
+            "name": dest["name"],
+            "description": dest["description"],
+            "eco_score": eco_score,
+            "budget_level": _DEST_BUDGETS[i],
+            "score": scores[i],
+            "match_reasons": _match_reasons(reason_flags[i], budget, travel_type, eco_score),
+            "sustainability_features": dest["sustainability_features"],
+            "carbon_rating": dest["carbon_rating"],
+            "distance": DEST_DISTANCES[i]
+        })
     
-    for dest_id, dest in DESTINATIONS.items():
+    return recommendations
+
+
+def _score_destinations(budget, travel_type, duration, sustainability_pref, month_bit):
+    """
+    Scoring kernel: score every destination from the feature columns.
+    Returns parallel (scores, reason_flags) lists; reasons are _R_* bit
+    flags so no strings are built for destinations that are not returned.
+    """
+    # Encode the query once; the loop below compares small ints only
+    budget_code = _BUDGET_CODES.get(budget, -1)
+    type_bit = _TYPE_BITS.get(travel_type, 0)
+    
+    scores = []
+    reason_flags = []
+    for i in range(len(DEST_IDS)):
         score = 0
-        match_reasons = []
+        flags = 0
+        level_code = _DEST_BUDGET_CODES[i]
         
-        # Budget matching (25 points max)
-        if dest["budget_level"] == budget:
+        # Budget matching (25 points max); unknown levels only match by name
+        if level_code == budget_code or (level_code == -2 and _DEST_BUDGETS[i] == budget):
             score += 25
-            match_reasons.append(f"Matches your {budget} budget")
-        elif (budget == "medium" and dest["budget_level"] in ["low", "medium"]) or \
-             (budget == "high"):
+            flags |= _R_BUDGET_MATCH
+        elif (budget_code == 1 and 0 <= level_code <= 1) or budget_code == 2:
             score += 15
-            match_reasons.append("Within budget range")
+            flags |= _R_WITHIN_BUDGET
         
         # Travel type matching (30 points max)
-        if travel_type in dest["type"]:
+        type_mask = _DEST_TYPE_MASKS[i]
+        if type_mask & type_bit:
             score += 30
-            match_reasons.append(f"Perfect for {travel_type} travelers")
-        elif any(t in ["nature", "relaxation"] for t in dest["type"]):
+            flags |= _R_TYPE_MATCH
+        elif type_mask & _UNIVERSAL_TYPES_MASK:
             score += 10  # Nature/relaxation are universally appealing
         
         # Duration-distance optimization (20 points max)
-        distance = dest["distance_from_delhi"]
-        if duration <= 3 and distance <= 500:
+        band = _DEST_DISTANCE_BANDS[i]
+        if duration <= 3 and band == 0:
             score += 20
-            match_reasons.append("Ideal for short trips")
-        elif duration <= 5 and distance <= 1000:
+            flags |= _R_SHORT_TRIP
+        elif duration <= 5 and band <= 1:
             score += 18
-            match_reasons.append("Good for medium duration")
-        elif duration > 5 and distance <= 2500:
+            flags |= _R_MEDIUM_TRIP
+        elif duration > 5 and band <= 2:
             score += 15
-            match_reasons.append("Suitable for longer stays")
+            flags |= _R_LONG_TRIP
         elif duration > 7:
             score += 10  # Long trips can go anywhere
         
         # Sustainability preference matching (25 points max)
-        eco_match = abs(dest["eco_score"] - sustainability_pref)
+        eco_match = abs(DEST_ECO_SCORES[i] - sustainability_pref)
         if eco_match <= 1:
             score += 25
-            match_reasons.append(f"Eco-score {dest['eco_score']}/10 matches your preference")
+            flags |= _R_ECO_MATCH
         elif eco_match <= 2:
             score += 20
-            match_reasons.append(f"Good eco-score: {dest['eco_score']}/10")
+            flags |= _R_GOOD_ECO
         elif eco_match <= 3:
             score += 15
         else:
             score += 10
         
         # Seasonal bonus (10 points)
-        if current_month in dest["best_season"]:
+        if DEST_BEST_SEASON_MASKS[i] & month_bit:
             score += 10
-            match_reasons.append("Great time to visit!")
+            flags |= _R_IN_SEASON
         
-        # Compile recommendation
-        recommendations.append({
-            "id": dest_id,
-            "name": dest["name"],
-            "description": dest["description"],
-            "eco_score": dest["eco_score"],
-            "budget_level": dest["budget_level"],
-            "score": score,
-            "match_reasons": match_reasons[:3],  # Top 3 reasons
-            "sustainability_features": dest["sustainability_features"],
-            "carbon_rating": dest["carbon_rating"],
-            "distance": distance
-        })
+        scores.append(score)
+        reason_flags.append(flags)
     
-    # Sort by score descending
-    recommendations.sort(key=lambda x: x["score"], reverse=True)
+    return scores, reason_flags
+
+
+def _match_reasons(flags, budget, travel_type, eco_score):
+    """Reason strings for a destination's _R_* flags, top 3 in scoring order"""
+    reasons = []
+    if flags & _R_BUDGET_MATCH:
+        reasons.append(f"Matches your {budget} budget")
+    elif flags & _R_WITHIN_BUDGET:
+        reasons.append("Within budget range")
+    if flags & _R_TYPE_MATCH:
+        reasons.append(f"Perfect for {travel_type} travelers")
+    if flags & _R_SHORT_TRIP:
+        reasons.append("Ideal for short trips")
+    elif flags & _R_MEDIUM_TRIP:
+        reasons.append("Good for medium duration")
+    elif flags & _R_LONG_TRIP:
+        reasons.append("Suitable for longer stays")
+    if flags & _R_ECO_MATCH:
+        reasons.append(f"Eco-score {eco_score}/10 matches your preference")
+    elif flags & _R_GOOD_ECO:
+        reasons.append(f"Good eco-score: {eco_score}/10")
+    if flags & _R_IN_SEASON:
+        reasons.append("Great time to visit!")
+    return reasons[:3]
+
+
+@dataclass(slots=True)
+class DayPlan:
+    """One itinerary day; a slotted object rather than a dict per day"""
+    day: int
+    morning: str = ""
+    afternoon: str = ""
+    evening: str = ""
+    eco_tip: str = ""
+
+
+# Itinerary building blocks, shared by every generate_itinerary call
+_ACTIVITIES_POOL = {
+    "adventure": ("Trekking", "River rafting", "Mountain biking", "Paragliding", "Camping"),
+    "nature": ("Nature walk", "Bird watching", "Wildlife safari", "Botanical garden visit", "Sunrise viewing"),
+    "spiritual": ("Temple visit", "Yoga session", "Meditation retreat", "Ganga Aarti", "Ashram experience"),
+    "cultural": ("Heritage walk", "Museum visit", "Local craft workshop", "Folk dance show", "Cooking class"),
+    "beach": ("Beach cleanup activity", "Snorkeling", "Sunset cruise", "Beach yoga", "Coastal walk"),
+    "relaxation": ("Spa treatment", "Houseboat cruise", "Tea tasting", "Ayurvedic therapy", "Scenic picnic")
+}
+
+# Sustainable options based on preference
+_SUSTAINABLE_ACTIVITIES = (
+    "Visit local organic farm",
+    "Community interaction",
+    "Local artisan workshop",
+    "Eco-trail hike",
+    "Traditional cooking with locals"
+)
+
+_ECO_TIPS = (
+    "Use refillable water bottles to reduce plastic waste",
+    "Support local businesses by buying handmade souvenirs",
+    "Use public transport or walk when possible",
+    "Respect local customs and dress codes",
+    "Conserve water and electricity at your accommodation",
+    "Avoid single-use plastics",
+    "Participate in any available cleanup activities"
+)
+
+
+def _schedule_key(dest_types, sustainable):
+    """(primary type, secondary type, sustainable) for a destination's type list"""
+    primary_type = dest_types[0]
+    secondary_type = dest_types[1] if len(dest_types) > 1 else primary_type
+    return primary_type, secondary_type, sustainable
+
+
+def _build_schedule(primary_type, secondary_type, sustainable):
+    """
+    One full rotation of (morning, afternoon) activities for the middle days,
+    starting at day 2. Mornings cycle through the primary type's pool;
+    afternoons through the sustainable activities, or else the secondary
+    type's pool one step ahead of the morning.
+    """
+    pool = _ACTIVITIES_POOL.get(primary_type, _ACTIVITIES_POOL["nature"])
+    if sustainable:
+        afternoons = _SUSTAINABLE_ACTIVITIES
+        period = math.lcm(len(pool), len(afternoons))
+        return tuple(
+            (pool[i % len(pool)], afternoons[i % len(afternoons)])
+            for i in range(period)
+        )
     
-    return recommendations[:5]  # Return top 5
+    afternoons = _ACTIVITIES_POOL.get(secondary_type, pool)
+    return tuple(
+        (pool[i], afternoons[(i + 1) % len(afternoons)])
+        for i in range(len(pool))
+    )
+
+
+# Activity rotations for every catalogue destination's types, built at import
+_SCHEDULES = {
+    key: _build_schedule(*key)
+    for key in {
+        _schedule_key(d["type"], sustainable)
+        for d in DESTINATIONS.values()
+        for sustainable in (False, True)
+    }
+}
 
 
 def generate_itinerary(destination_id, duration, budget, sustainability_pref):
@@ -110,75 +289,32 @@ def generate_itinerary(destination_id, duration, budget, sustainability_pref):
         "days": []
     }
     
-    # Rule-based activity assignment
-    activities_pool = {
-        "adventure": ["Trekking", "River rafting", "Mountain biking", "Paragliding", "Camping"],
-        "nature": ["Nature walk", "Bird watching", "Wildlife safari", "Botanical garden visit", "Sunrise viewing"],
-        "spiritual": ["Temple visit", "Yoga session", "Meditation retreat", "Ganga Aarti", "Ashram experience"],
-        "cultural": ["Heritage walk", "Museum visit", "Local craft workshop", "Folk dance show", "Cooking class"],
-        "beach": ["Beach cleanup activity", "Snorkeling", "Sunset cruise", "Beach yoga", "Coastal walk"],
-        "relaxation": ["Spa treatment", "Houseboat cruise", "Tea tasting", "Ayurvedic therapy", "Scenic picnic"]
-    }
-    
-    # Sustainable options based on preference
-    sustainable_activities = [
-        "Visit local organic farm",
-        "Community interaction",
-        "Local artisan workshop",
-        "Eco-trail hike",
-        "Traditional cooking with locals"
-    ]
+    # Rule-based activity assignment: the middle days follow a rotation
+    # precomputed for the destination's types and the sustainability choice
+    schedule_key = _schedule_key(dest["type"], sustainability_pref >= 7)
+    schedule = _SCHEDULES.get(schedule_key) or _build_schedule(*schedule_key)
+    eco_tips = _ECO_TIPS
+    days = itinerary["days"]
     
     for day in range(1, duration + 1):
-        day_plan = {
-            "day": day,
-            "morning": "",
-            "afternoon": "",
-            "evening": "",
-            "eco_tip": ""
-        }
-        
-        # Assign activities based on destination type and day
-        dest_types = dest["type"]
-        primary_type = dest_types[0]
+        # Add eco-tips
+        eco_tip = eco_tips[(day - 1) % len(eco_tips)]
         
         if day == 1:
-            day_plan["morning"] = "Arrival and check-in at eco-friendly accommodation"
-            day_plan["afternoon"] = "Local area orientation walk"
-            day_plan["evening"] = "Welcome dinner with local cuisine"
+            days.append(DayPlan(
+                day,
+                "Arrival and check-in at eco-friendly accommodation",
+                "Local area orientation walk",
+                "Welcome dinner with local cuisine",
+                eco_tip
+            ))
         elif day == duration:
-            day_plan["morning"] = "Leisure morning / packing"
-            day_plan["afternoon"] = "Departure"
-            day_plan["evening"] = "Travel"
+            days.append(DayPlan(day, "Leisure morning / packing", "Departure", "Travel", eco_tip))
         else:
             # Rotate through activities
-            pool = activities_pool.get(primary_type, activities_pool["nature"])
-            idx = (day - 2) % len(pool)
-            day_plan["morning"] = pool[idx]
-            
-            if sustainability_pref >= 7:
-                sus_idx = (day - 2) % len(sustainable_activities)
-                day_plan["afternoon"] = sustainable_activities[sus_idx]
-            else:
-                secondary_type = dest_types[1] if len(dest_types) > 1 else primary_type
-                sec_pool = activities_pool.get(secondary_type, pool)
-                day_plan["afternoon"] = sec_pool[(idx + 1) % len(sec_pool)]
-            
-            day_plan["evening"] = "Local dining experience" if day % 2 == 0 else "Rest and cultural show"
-        
-        # Add eco-tips
-        eco_tips = [
-            "Use refillable water bottles to reduce plastic waste",
-            "Support local businesses by buying handmade souvenirs",
-            "Use public transport or walk when possible",
-            "Respect local customs and dress codes",
-            "Conserve water and electricity at your accommodation",
-            "Avoid single-use plastics",
-            "Participate in any available cleanup activities"
-        ]
-        day_plan["eco_tip"] = eco_tips[(day - 1) % len(eco_tips)]
-        
-        itinerary["days"].append(day_plan)
+            morning, afternoon = schedule[(day - 2) % len(schedule)]
+            evening = "Local dining experience" if day % 2 == 0 else "Rest and cultural show"
+            days.append(DayPlan(day, morning, afternoon, evening, eco_tip))
     
     # Add accommodation suggestion
     if sustainability_pref >= 7:
@@ -3,36 +3,156 @@ User Module for EcoJourney
 Handles user-related operations like history tracking and profile management.
 """
 
-from modules.auth_module import get_db_connection
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from modules.auth_module import get_db_connection, release_db_connection
+from modules.knowledge_base import DESTINATIONS
 from mysql.connector import Error
 
-def add_user_history(user_id, destination_name, destination_id, search_type='view'):
+# Background history writer settings
+HISTORY_BATCH_SIZE = 100
+HISTORY_FLUSH_SECONDS = 1.0
+
+_history_queue = queue.Queue()
+_history_thread = None
+_history_lock = threading.Lock()
+
+# Single-row INSERT; executemany on a plain cursor rewrites it into one
+# multi-row INSERT (a prepared cursor would execute it once per row, and
+# its statement handle would not outlive the per-call cursor anyway)
+INSERT_HISTORY_QUERY = """
+INSERT INTO user_history (user_id, destination_id, search_type, timestamp)
+VALUES (%s, %s, %s, %s)
+"""
+
+# Latest view per destination, deduplicated at write time. The view time is
+# passed in (not NOW()) so rows written in one batch keep their own order.
+UPSERT_RECENT_DESTINATION_QUERY = """
+INSERT INTO user_recent_destinations (user_id, destination_id, last_visited)
+VALUES (%s, %s, %s)
+ON DUPLICATE KEY UPDATE last_visited = GREATEST(last_visited, VALUES(last_visited))
+"""
+
+def add_user_history(user_id, destination_id, search_type='view'):
     """
     Add a record to user's search/view history.
     """
+    return add_user_history_many([(user_id, destination_id, search_type, datetime.now())])
+
+def add_user_history_many(records):
+    """
+    Add several history records in one transaction, also refreshing the
+    user's recent destinations. If the batch fails, the records are retried
+    one at a time so only the failing ones are dropped.
+    records: iterable of (user_id, destination_id, search_type, viewed_at)
+    Returns True if every record was written.
+    """
+    records = list(records)
+    if not records:
+        return True
+    
     connection = get_db_connection()
     if not connection:
         return False
     
+    cursor = None
     try:
         cursor = connection.cursor()
+        try:
+            _write_history(cursor, records)
+            connection.commit()
+            return True
+        except Error as e:
+            connection.rollback()
+            if len(records) == 1:
+                raise
+            print(f"Failed to add history batch, retrying per record: {e}")
         
-        # Insert history record
-        query = """
-        INSERT INTO user_history (user_id, destination_name, destination_id, search_type)
-        VALUES (%s, %s, %s, %s)
-        """
-        cursor.execute(query, (user_id, destination_name, destination_id, search_type))
-        connection.commit()
-        return True
+        # One bad row (e.g. a user deleted since the view) fails the whole
+        # multi-row INSERT; written one by one, the other users' rows survive
+        all_written = True
+        for record in records:
+            try:
+                _write_history(cursor, [record])
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                print(f"Failed to add history for user {record[0]}: {e}")
+                all_written = False
+        return all_written
         
     except Error as e:
         print(f"Failed to add history: {e}")
         return False
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
+
+
+def _write_history(cursor, records):
+    """Insert the history rows and upsert the recent destinations (no commit)"""
+    cursor.executemany(INSERT_HISTORY_QUERY, records)
+    cursor.executemany(UPSERT_RECENT_DESTINATION_QUERY, [
+        (user_id, destination_id, viewed_at) for user_id, destination_id, _, viewed_at in records
+    ])
+
+
+def queue_user_history(user_id, destination_id, search_type='view'):
+    """
+    Queue a history record to be written by the background writer,
+    keeping the database insert out of the request path. The view time is
+    taken now, not when the batch is written.
+    """
+    _start_history_writer()
+    _history_queue.put_nowait((user_id, destination_id, search_type, datetime.now()))
+
+
+def flush_user_history():
+    """Write out everything currently queued"""
+    batch = []
+    while True:
+        try:
+            batch.append(_history_queue.get_nowait())
+        except queue.Empty:
+            break
+    add_user_history_many(batch)
+
+
+def _start_history_writer():
+    """Start the writer thread on first use (after any server worker fork)"""
+    global _history_thread
+    if _history_thread is not None:
+        return
+    with _history_lock:
+        if _history_thread is None:
+            _history_thread = threading.Thread(target=_history_writer, name='history-writer', daemon=True)
+            _history_thread.start()
+            atexit.register(flush_user_history)
+
+
+def _history_writer():
+    """Drain the queue in batches of up to HISTORY_BATCH_SIZE or HISTORY_FLUSH_SECONDS"""
+    while True:
+        batch = [_history_queue.get()]
+        deadline = time.monotonic() + HISTORY_FLUSH_SECONDS
+        
+        while len(batch) < HISTORY_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_history_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            add_user_history_many(batch)
+        except Exception as e:
+            # Never let one bad batch kill the writer thread
+            print(f"Failed to add history: {e}")
+
 
 def get_user_history(user_id, limit=5):
     """
@@ -42,26 +162,30 @@ def get_user_history(user_id, limit=5):
     if not connection:
         return []
     
+    cursor = None
     try:
         cursor = connection.cursor(dictionary=True)
         
-        # Get recent unique history (group by destination to avoid duplicates in list)
-        # Note: GROUP BY might pick arbitrary timestamps, so better to use MAX(timestamp)
+        # Get recent unique history: already one row per destination, so
+        # this is a range scan of the (user_id, last_visited DESC) index
         query = """
-        SELECT destination_name, destination_id, MAX(timestamp) as last_visited
-        FROM user_history
+        SELECT destination_id, last_visited
+        FROM user_recent_destinations
         WHERE user_id = %s
-        GROUP BY destination_name, destination_id
         ORDER BY last_visited DESC
         LIMIT %s
         """
         cursor.execute(query, (user_id, limit))
-        return cursor.fetchall()
+        history = cursor.fetchall()
+        
+        # Names come from the in-memory catalogue rather than the table
+        for row in history:
+            dest = DESTINATIONS.get(row["destination_id"])
+            row["destination_name"] = dest["name"] if dest else "Unknown Destination"
+        return history
         
     except Error as e:
         print(f"Failed to get history: {e}")
         return []
     finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
+        release_db_connection(connection, cursor)
@@ -42,7 +42,6 @@ CREATE TABLE IF NOT EXISTS user_history (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
     destination_id VARCHAR(50) NOT NULL,
-    destination_name VARCHAR(100) NOT NULL,
     search_type VARCHAR(20) DEFAULT 'view',
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -51,6 +50,47 @@ CREATE TABLE IF NOT EXISTS user_history (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 """
 
+# Latest view per (user, destination), upserted on every history write so
+# the profile page reads it with a plain index range scan
+CREATE_RECENT_DESTINATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS user_recent_destinations (
+    user_id INT NOT NULL,
+    destination_id VARCHAR(50) NOT NULL,
+    last_visited DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, destination_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    INDEX idx_user_recent (user_id, last_visited DESC)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+"""
+
+# Seed it from existing history (latest row per user and destination);
+# rows already present are kept
+BACKFILL_RECENT_DESTINATIONS = """
+INSERT IGNORE INTO user_recent_destinations (user_id, destination_id, last_visited)
+SELECT user_id, destination_id, MAX(timestamp)
+FROM user_history
+GROUP BY user_id, destination_id
+"""
+
+# Destination names are resolved from DESTINATIONS when history is read;
+# tables created before that still carry a destination_name column
+NAME_COLUMN_TABLES = """
+SELECT table_name FROM information_schema.columns
+WHERE table_schema = DATABASE() AND column_name = 'destination_name'
+AND table_name IN ('user_history', 'user_recent_destinations')
+"""
+
+DROP_NAME_COLUMN = "ALTER TABLE {} DROP COLUMN destination_name"
+
+# Database and tables, sent to the server as one multi-statement batch
+SETUP_DDL = ";\n".join([
+    "CREATE DATABASE IF NOT EXISTS ecojourney_db",
+    "USE ecojourney_db",
+    CREATE_USERS_TABLE.strip().rstrip(";"),
+    CREATE_HISTORY_TABLE.strip().rstrip(";"),
+    CREATE_RECENT_DESTINATIONS_TABLE.strip().rstrip(";")
+])
+
 def setup_database():
     """Create database and users table"""
     connection = None
@@ -64,25 +104,24 @@ def setup_database():
             print("[OK] Connected to MySQL server")
             cursor = connection.cursor()
             
-            # Create database
-            print("Creating database 'ecojourney_db'...")
-            cursor.execute("CREATE DATABASE IF NOT EXISTS ecojourney_db")
+            # Create database, switch to it and create the users and
+            # user history tables in a single round trip
+            print("Creating database 'ecojourney_db' and tables...")
+            cursor.execute(SETUP_DDL)
+            while cursor.nextset():
+                pass
             print("[OK] Database created/verified")
-            
-            # Switch to the database
-            cursor.execute("USE ecojourney_db")
-            
-            # Create users table
-            print("Creating 'users' table...")
-            cursor.execute(CREATE_USERS_TABLE)
-            connection.commit()
             print("[OK] Users table created/verified")
             
-            # Create user history table
-            print("Creating 'user_history' table...")
-            cursor.execute(CREATE_HISTORY_TABLE)
+            cursor.execute(NAME_COLUMN_TABLES)
+            for (table,) in cursor.fetchall():
+                print(f"Dropping 'destination_name' from '{table}'...")
+                cursor.execute(DROP_NAME_COLUMN.format(table))
+            
+            cursor.execute(BACKFILL_RECENT_DESTINATIONS)
             connection.commit()
             print("[OK] User history table created/verified")
+            print("[OK] Recent destinations table created/verified")
             
             print("")
             print("=" * 50)